@@ -1,17 +1,30 @@
-from netmiko import ConnectHandler
-import re
-import pandas as pd
+import contextvars
 import os
-import socket
-# Algunas instalaciones/linter no resuelven netmiko.ssh_exception; usar fallback seguro
-try:
-    from netmiko.ssh_exception import NetmikoTimeoutException, NetmikoAuthenticationException
-except Exception:
-    class NetmikoTimeoutException(Exception):
-        pass
-
-    class NetmikoAuthenticationException(Exception):
-        pass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from alcanzabilidad import Alcanzabilidad
+from ssh_pool import PoolSSH
+from grabacion import conectar_grabando
+from telemetria import TELEMETRIA, conectar_instrumentado
+from tablas_cache import CacheTablas, normalizar_interfaz
+from tablas_compactas import int_a_mac, mac_a_int
+from salida_csv import escribir_csv, tabla_texto
+import topologia
+
+
+def errores_netmiko():
+    """
+    Excepciones de conexión de netmiko, importadas al necesitarlas: netmiko tarda
+    medio segundo en cargar y el sondeo o el snapshot no lo usan.
+    """
+    # Algunas instalaciones/linter no resuelven netmiko.ssh_exception; usar fallback seguro
+    try:
+        from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
+    except Exception:
+        try:
+            from netmiko.ssh_exception import NetmikoTimeoutException, NetmikoAuthenticationException
+        except Exception:
+            return ()
+    return NetmikoTimeoutException, NetmikoAuthenticationException
 
 ROOT_SWITCH = {
     "device_type": "cisco_ios",
@@ -22,84 +35,81 @@ ROOT_SWITCH = {
 
 VISITADOS = set()
 
+# Número máximo de rastreos simultáneos en el modo por lote
+MAX_RASTREOS_PARALELOS = 8
+
+# Sesiones SSH reutilizadas entre saltos y rastreos.
+# Con GRABAR_SESIONES=1 cada sesión se guarda en grabaciones/ para reproducirla luego.
+# Cada sesión va instrumentada (TELEMETRIA_JSONL / TELEMETRIA_PROM para volcar los spans).
+POOL = PoolSSH(conectar=conectar_instrumentado(conectar_grabando() if os.environ.get("GRABAR_SESIONES") else None))
+
+# Tablas ARP/MAC/CDP/IP indexadas por equipo (se renuevan tras TTL_TABLAS segundos)
+CACHE = CacheTablas()
+
+# Resultados del sondeo del puerto 22 con caducidad y timeout adaptado al RTT de cada equipo
+ALCANCE = Alcanzabilidad()
+
 
 def limpiar():
     os.system("cls" if os.name == "nt" else "clear")
 
 
-def conectar(sw):
-    # Intentar conectar y manejar excepciones para evitar que el script se caiga
+def conectar(sw, timeout=None):
+    # Intentar conectar y manejar excepciones para evitar que el script se caiga.
+    # `timeout`: segundos esperando una sesión libre del pool (TimeoutError es un OSError)
     try:
-        return ConnectHandler(**sw)
-    except (NetmikoTimeoutException, NetmikoAuthenticationException, OSError) as e:
+        return POOL.obtener(sw, timeout=timeout)
+    except (*errores_netmiko(), OSError) as e:
         print(f"⚠️ Error al conectar a {sw.get('host')}: {e}")
         return None
 
 
+def liberar(conn):
+    """Devuelve la sesión al pool en lugar de cerrarla."""
+    POOL.devolver(conn)
+
+
 def puerto_abierto(host, port=22, timeout=2):
-    """Comprueba si el puerto TCP está abierto en el host (uso previo a intentar SSH)."""
-    try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return True
-    except Exception:
-        return False
+    """
+    Comprueba si el puerto TCP está abierto en el host (uso previo a intentar SSH).
+    Un host ya sondeado se resuelve desde ALCANCE sin esperar; `timeout` es el
+    máximo que se espera (el RTO adaptativo de ALCANCE suele ser mucho menor).
+    """
+    with TELEMETRIA.span("sondeo", host=host) as s:
+        s["cache"] = ALCANCE.conocido(host, port) is not None
+        if not ALCANCE.abierto(host, port, timeout_max=timeout):
+            s["abierto"] = False
+            return False
+        return True
 
 
 def obtener_mac_por_ip(conn, ip):
-    output = conn.send_command(f"show ip arp {ip}")
-    # Buscar formato como: Internet  192.168.1.10           3   001b.7842.0a00  ARPA
-    m = re.search(rf"Internet\s+{re.escape(ip)}\s+\S+\s+([0-9a-fA-F\.:-]+)\s+ARPA", output)
-    if not m:
-        return None
-    mac = m.group(1)
-    # devolver en formato sin separadores (para comparar con salida de mac address-table)
-    return mac.replace('.', '').replace(':', '').replace('-', '').lower()
+    # 'show ip arp <ip>' o la tabla ARP completa si el equipo recibe muchas consultas
+    # devuelve la MAC sin separadores (para comparar con la tabla MAC)
+    return CACHE.buscar(conn, "arp", ip)
 
 
 def normalizar_mac(mac):
-    mac = mac.replace('.', '').replace(':', '').replace('-', '').lower()
-    if len(mac) != 12:
-        return mac
-    return ':'.join(mac[i:i+2] for i in range(0, 12, 2))
+    try:
+        return int_a_mac(mac_a_int(mac), "dos_puntos")
+    except ValueError:
+        return mac.replace('.', '').replace(':', '').replace('-', '').lower()
 
 
 def buscar_mac_table(conn, mac):
     """
     Busca la MAC (sin separadores) en la tabla MAC y devuelve VLAN e interfaz.
     """
-    output = conn.send_command("show mac address-table")
-    mac_n = mac.lower()
-    for line in output.splitlines():
-        clean = line.replace('.', '').replace(':', '').replace('-', '').lower()
-        if mac_n in clean:
-            # intentar parsear: VLAN MAC TYPE PORT
-            m = re.search(r"^(\s*\d+)\s+([0-9a-fA-F\.:-]+)\s+\S+\s+(\S+)$", line.strip())
-            if m:
-                vlan = m.group(1).strip()
-                intf = m.group(3).strip()
-                return {"vlan": vlan, "intf": intf}
-            # si no concuerda regex simple por columnas
-            parts = line.split()
-            if len(parts) >= 4:
-                return {"vlan": parts[0], "intf": parts[-1]}
-    return None
+    return CACHE.buscar(conn, "mac", mac.lower())
 
 
 def obtener_ip_cdp_por_interfaz(conn, interfaz):
     """
-    Ejecuta 'show cdp neighbors <intf> detail' y extrae la IP del vecino si existe.
+    Busca la IP del vecino CDP conectado en <intf> ('show cdp neighbors <intf> detail'
+    o la tabla CDP completa si el equipo recibe muchas consultas).
     Devuelve la IP como string o None.
     """
-    out = conn.send_command(f"show cdp neighbors {interfaz} detail")
-    # Buscar líneas con IP address: 10.0.0.1
-    m = re.search(r"IP address:\s*(\d+\.\d+\.\d+\.\d+)", out)
-    if m:
-        return m.group(1)
-    # Algunos dispositivos muestran 'IP address: 10.0.0.1' o 'Management address(es):\n  IP: 10.0.0.1'
-    m2 = re.search(r"IP\s*:\s*(\d+\.\d+\.\d+\.\d+)", out)
-    if m2:
-        return m2.group(1)
-    return None
+    return CACHE.buscar(conn, "cdp", normalizar_interfaz(interfaz))
 
 
 def interfaz_es_trunk(conn, interfaz):
@@ -111,85 +121,249 @@ def interfaz_es_trunk(conn, interfaz):
 
 
 def obtener_ip_vlan(conn, vlan):
-    out = conn.send_command("show ip interface brief")
-    for line in out.splitlines():
-        if re.search(rf"Vlan{vlan}\b", line):
-            m = re.search(r"(Vlan\d+)\s+(\d+\.\d+\.\d+\.\d+)", line)
-            if m:
-                return m.group(2)
-    return None
+    return CACHE.buscar(conn, "vlan_ip", str(vlan))
 
 
-def rastrear(sw, ip_buscada):
+def rastrear(sw, ip_buscada, visitados=None):
+    """
+    Sigue la IP salto a salto desde `sw`. `visitados` permite que cada rastreo
+    use su propio conjunto; si no se indica se usa el global VISITADOS.
+    """
+    if visitados is None:
+        visitados = VISITADOS
+    with TELEMETRIA.traza(ip_buscada):
+        return _rastrear(sw, ip_buscada, visitados)
+
+
+def _rastrear(sw, ip_buscada, visitados):
     ruta = []
     actual = sw
 
     while True:
-        if actual["host"] in VISITADOS:
+        if actual["host"] in visitados:
             print(f"⚠️ Ya se visitó {actual['host']}, deteniendo bucle.")
             break
-        VISITADOS.add(actual["host"])
-
-        print(f"\n🔗 Conectando a {actual['host']} ...")
-        # Antes de intentar SSH, comprobar que el puerto 22 esté accesible
-        if not puerto_abierto(actual["host"]):
-            print(f"⚠️ No se puede alcanzar {actual['host']} en el puerto 22. Deteniendo este salto.")
+        visitados.add(actual["host"])
+
+        with TELEMETRIA.salto(len(ruta) + 1, actual["host"]):
+            print(f"\n🔗 Conectando a {actual['host']} ...")
+            # Antes de intentar SSH, comprobar que el puerto 22 esté accesible
+            if not puerto_abierto(actual["host"]):
+                print(f"⚠️ No se puede alcanzar {actual['host']} en el puerto 22. Deteniendo este salto.")
+                break
+
+            conn = conectar(actual)
+            if conn is None:
+                print(f"⚠️ Conexión SSH fallida a {actual['host']}, deteniendo rastreo desde este nodo.")
+                break
+            try:
+                hostname = conn.find_prompt().replace("#", "").strip()
+            except Exception as e:
+                print(f"⚠️ Sesión inválida con {actual['host']}: {e}")
+                POOL.devolver(conn, descartar=True)
+                break
+
+            # Si una consulta falla (socket cerrado, timeout de lectura) la sesión no vuelve al pool
+            try:
+                mac_raw = obtener_mac_por_ip(conn, ip_buscada)
+                info = buscar_mac_table(conn, mac_raw) if mac_raw else None
+                # Primero comprobar si en esa interfaz hay un vecino CDP
+                vecino_ip = obtener_ip_cdp_por_interfaz(conn, info["intf"]) if info else None
+            except Exception:
+                POOL.devolver(conn, descartar=True)
+                raise
+            liberar(conn)
+
+            if not mac_raw:
+                print(f"⚠️ No se encontró la IP {ip_buscada} en {hostname}")
+                break
+
+            mac_norm = normalizar_mac(mac_raw)
+            print(f"✅ {hostname}: IP {ip_buscada} → MAC {mac_norm}")
+
+            if not info:
+                print(f"⚠️ No se encontró la MAC {mac_norm} en {hostname}")
+                break
+
+            vlan = info["vlan"]
+            intf = info["intf"]
+            print(f"🔎 MAC encontrada en {intf} (VLAN {vlan})")
+
+            if vecino_ip:
+                print(f"🔁 Se detectó vecino en {intf} con IP {vecino_ip} → conectando al switch vecino...")
+                ruta.append({"sw_name": hostname, "ip_sw": actual["host"], "puerto": intf, "vlan": vlan, "next_ip": vecino_ip})
+                # preparar conexión al vecino y repetir búsqueda de la misma IP destino
+                actual = {
+                    "device_type": "cisco_ios",
+                    "host": vecino_ip,
+                    "username": sw["username"],
+                    "password": sw["password"],
+                }
+                continue
+
+            # Si no hay vecino CDP, puede ser un puerto de acceso hacia el host final
+            print(f"🏁 No se detectó vecino CDP en {intf}. Se asume dispositivo final conectado en {hostname}:{intf}")
+            ruta.append({
+                "sw_name": hostname,
+                "ip_sw": actual["host"],
+                "puerto": intf,
+                "vlan": vlan,
+                "mac_device": mac_norm,
+                "ip_device": ip_buscada,
+            })
             break
 
-        conn = conectar(actual)
-        if conn is None:
-            print(f"⚠️ Conexión SSH fallida a {actual['host']}, deteniendo rastreo desde este nodo.")
-            break
-        hostname = conn.find_prompt().replace("#", "").strip()
+    return ruta
 
-        mac_raw = obtener_mac_por_ip(conn, ip_buscada)
-        if not mac_raw:
-            print(f"⚠️ No se encontró la IP {ip_buscada} en {hostname}")
-            conn.disconnect()
-            break
 
-        mac_norm = normalizar_mac(mac_raw)
-        print(f"✅ {hostname}: IP {ip_buscada} → MAC {mac_norm}")
+def leer_ips(ruta_archivo):
+    """Lee un archivo con una IP por línea (ignora vacías y comentarios con #)."""
+    ips = []
+    with open(ruta_archivo, encoding="utf-8-sig") as f:
+        for linea in f:
+            linea = linea.split("#", 1)[0].strip()
+            if linea and linea not in ips:
+                ips.append(linea)
+    return ips
 
-        info = buscar_mac_table(conn, mac_raw)
-        if not info:
-            print(f"⚠️ No se encontró la MAC {mac_norm} en {hostname}")
-            conn.disconnect()
-            break
 
-        vlan = info["vlan"]
-        intf = info["intf"]
-        print(f"🔎 MAC encontrada en {intf} (VLAN {vlan})")
-
-        # Primero comprobar si en esa interfaz hay un vecino CDP
-        vecino_ip = obtener_ip_cdp_por_interfaz(conn, intf)
-        if vecino_ip:
-            print(f"🔁 Se detectó vecino en {intf} con IP {vecino_ip} → conectando al switch vecino...")
-            ruta.append({"sw_name": hostname, "ip_sw": actual["host"], "puerto": intf, "vlan": vlan, "next_ip": vecino_ip})
-            conn.disconnect()
-            # preparar conexión al vecino y repetir búsqueda de la misma IP destino
-            actual = {
-                "device_type": "cisco_ios",
-                "host": vecino_ip,
-                "username": sw["username"],
-                "password": sw["password"],
-            }
+def rastrear_lote(sw, ips, max_workers=MAX_RASTREOS_PARALELOS):
+    """
+    Rastrea varias IPs en paralelo con un pool de hilos acotado.
+    Cada rastreo usa su propio conjunto de visitados. Devuelve una lista de
+    filas combinadas (cada salto lleva la IP buscada en 'ip_buscada').
+    """
+    resultados = {}
+    # Todas las búsquedas pasan por el switch raíz: que baje sus tablas completas una vez
+    CACHE.registrar_pendientes(sw["host"], len(ips))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futuros = {pool.submit(rastrear, sw, ip, set()): ip for ip in ips}
+        for futuro in as_completed(futuros):
+            ip = futuros[futuro]
+            try:
+                resultados[ip] = futuro.result()
+            except Exception as e:
+                print(f"⚠️ Error rastreando {ip}: {e}")
+                resultados[ip] = []
+
+    return filas_por_ip(ips, resultados)
+
+
+def filas_por_ip(ips, rutas):
+    """{ip: ruta} -> filas combinadas en el orden de `ips` (formato de ruta_busqueda_ip.csv)."""
+    filas = []
+    # Mantener el orden del archivo de entrada
+    for ip in ips:
+        ruta = rutas.get(ip) or []
+        if not ruta:
+            filas.append({"ip_buscada": ip, "encontrado": False})
             continue
+        for salto in ruta:
+            filas.append({"ip_buscada": ip, **salto, "encontrado": True})
+    return filas
 
-        # Si no hay vecino CDP, puede ser un puerto de acceso hacia el host final
-        print(f"🏁 No se detectó vecino CDP en {intf}. Se asume dispositivo final conectado en {hostname}:{intf}")
-        ruta.append({
-            "sw_name": hostname,
-            "ip_sw": actual["host"],
-            "puerto": intf,
-            "vlan": vlan,
-            "mac_device": mac_norm,
-            "ip_device": ip_buscada,
-        })
-        conn.disconnect()
-        break
 
-    return ruta
+# ╔════════════════════════════════════════════════════════════════╗
+#   RASTREO MULTIDESTINO (RECORRIDO EN ÁRBOL)
+# ╚════════════════════════════════════════════════════════════════╝
+
+def _resolver_en_equipo(sw, pendientes):
+    """
+    Resuelve en un equipo todos los destinos que han llegado hasta él.
+    pendientes: {ip: ruta hasta este equipo}.
+    Devuelve (terminadas {ip: ruta}, siguientes {ip_vecino: {ip: ruta}}).
+    """
+    host = sw["host"]
+    if not puerto_abierto(host):
+        print(f"⚠️ No se puede alcanzar {host} en el puerto 22. Deteniendo {len(pendientes)} rastreos.")
+        return dict(pendientes), {}
+    conn = conectar(sw)
+    if conn is None:
+        return dict(pendientes), {}
+    try:
+        hostname = conn.find_prompt().replace("#", "").strip()
+    except Exception as e:
+        print(f"⚠️ Sesión inválida con {host}: {e}")
+        POOL.devolver(conn, descartar=True)
+        return dict(pendientes), {}
+
+    terminadas, siguientes = {}, {}
+    # Con muchos destinos, CACHE baja cada tabla una vez y resuelve el resto en memoria
+    CACHE.registrar_pendientes(host, len(pendientes))
+    try:
+        for ip, ruta in pendientes.items():
+            mac_raw = obtener_mac_por_ip(conn, ip)
+            info = buscar_mac_table(conn, mac_raw) if mac_raw else None
+            if not info:
+                terminadas[ip] = ruta
+                continue
+            salto = {"sw_name": hostname, "ip_sw": host, "puerto": info["intf"], "vlan": info["vlan"]}
+            vecino_ip = obtener_ip_cdp_por_interfaz(conn, info["intf"])
+            if not vecino_ip:
+                terminadas[ip] = ruta + [{**salto, "mac_device": normalizar_mac(mac_raw), "ip_device": ip}]
+            elif vecino_ip == host or any(s["ip_sw"] == vecino_ip for s in ruta):
+                # Bucle: misma ruta que devolvería rastrear (el salto repetido cierra la ruta)
+                terminadas[ip] = ruta + [{**salto, "next_ip": vecino_ip}]
+            else:
+                siguientes.setdefault(vecino_ip, {})[ip] = ruta + [{**salto, "next_ip": vecino_ip}]
+    except Exception as e:
+        # La sesión falló a medio comando (y puede tener datos sin leer): no vuelve al pool.
+        # Los destinos aún sin resolver terminan con la ruta que llevaban.
+        print(f"⚠️ Error en {hostname}: {e}")
+        POOL.devolver(conn, descartar=True)
+        encaminadas = {ip for p in siguientes.values() for ip in p}
+        for ip, ruta in pendientes.items():
+            if ip not in terminadas and ip not in encaminadas:
+                terminadas[ip] = ruta
+        return terminadas, siguientes
+    liberar(conn)
+    print(f"✅ {hostname}: {len(terminadas)} destinos resueltos, {len(siguientes)} vecinos por visitar")
+    return terminadas, siguientes
+
+
+def rastrear_arbol(sw, ips, max_workers=MAX_RASTREOS_PARALELOS):
+    """
+    Rastrea todas las IPs a la vez como un recorrido en árbol desde `sw`: cada
+    equipo se visita una sola vez por nivel con todos los destinos que pasan por
+    él, y sólo se baja a los vecinos CDP distintos que hacen falta.
+    Devuelve {ip: ruta} con las mismas filas que rastrear.
+    """
+    ips = list(dict.fromkeys(ips))
+    rutas = {}
+    nivel = {sw["host"]: {ip: [] for ip in ips}}
+    with TELEMETRIA.traza(f"arbol-{len(ips)}"), ThreadPoolExecutor(max_workers=max_workers) as pool:
+        numero = 1
+        while nivel:
+            print(f"\n🌳 Nivel {numero}: {len(nivel)} equipos, {sum(map(len, nivel.values()))} destinos")
+            futuros = {}
+            for host, pendientes in nivel.items():
+                credenciales = sw if host == sw["host"] else {
+                    "device_type": "cisco_ios",
+                    "host": host,
+                    "username": sw["username"],
+                    "password": sw["password"],
+                }
+                contexto = contextvars.copy_context()  # la traza sigue al hilo
+                futuros[host] = pool.submit(contexto.run, _salto_arbol, numero, credenciales, pendientes)
+            actual, nivel = nivel, {}
+            for host, futuro in futuros.items():
+                try:
+                    terminadas, siguientes = futuro.result()
+                except Exception as e:
+                    print(f"⚠️ Error en {host}: {e}")
+                    rutas.update(actual[host])
+                    continue
+                rutas.update(terminadas)
+                for vecino, pendientes in siguientes.items():
+                    nivel.setdefault(vecino, {}).update(pendientes)
+            numero += 1
+    return {ip: rutas.get(ip, []) for ip in ips}
+
+
+def _salto_arbol(numero, sw, pendientes):
+    with TELEMETRIA.salto(numero, sw["host"]) as s:
+        s["destinos"] = len(pendientes)
+        return _resolver_en_equipo(sw, pendientes)
 
 
 def menu():
@@ -199,7 +373,10 @@ def menu():
         print("🔍 Rastreador de IP (detección VLAN inter-switch)")
         print("="*65)
         print("1️⃣  Buscar IP")
-        print("2️⃣  Salir")
+        print("2️⃣  Buscar IPs desde archivo (lote)")
+        print("3️⃣  Descubrir topología (crawl) y guardar snapshot")
+        print("4️⃣  Buscar IP en el snapshot (sin conectar)")
+        print("5️⃣  Salir")
         print("="*65)
         opcion = input("Selecciona una opción: ")
 
@@ -211,15 +388,52 @@ def menu():
             ruta = rastrear(ROOT_SWITCH, ip)
 
             if ruta:
-                df = pd.DataFrame(ruta)
                 print("\n=== RUTA COMPLETA ===")
-                print(df.to_string(index=False))
-                df.to_csv("ruta_busqueda_ip.csv", index=False)
+                print(tabla_texto(ruta))
+                escribir_csv(ruta, "ruta_busqueda_ip.csv")
                 print("\n📄 Guardado en: ruta_busqueda_ip.csv")
             else:
                 print("\n⚠️ No se encontró la IP en la red.")
             input("\nPresiona Enter para continuar...")
         elif opcion == "2":
+            archivo = input("Ruta del archivo con IPs (una por línea): ").strip()
+            try:
+                ips = leer_ips(archivo)
+            except OSError as e:
+                print(f"⚠️ No se pudo leer {archivo}: {e}")
+                input("\nPresiona Enter para continuar...")
+                continue
+            print(f"\n🚀 Rastreando {len(ips)} IPs (recorrido compartido)...\n")
+            filas = filas_por_ip(ips, rastrear_arbol(ROOT_SWITCH, ips))
+
+            if filas:
+                print("\n=== RESULTADO DEL LOTE ===")
+                print(tabla_texto(filas))
+                escribir_csv(filas, "ruta_busqueda_ip.csv")
+                print("\n📄 Guardado en: ruta_busqueda_ip.csv")
+            else:
+                print("\n⚠️ El archivo no contiene IPs.")
+            input("\nPresiona Enter para continuar...")
+        elif opcion == "3":
+            print("\n🚀 Recorriendo la red por CDP...\n")
+            equipos = topologia.crawl(ROOT_SWITCH, pool=POOL, alcance=ALCANCE)
+            topologia.guardar_snapshot(equipos, ROOT_SWITCH["host"])
+            print(f"✅ {len(equipos)} equipos en el snapshot.")
+            input("\nPresiona Enter para continuar...")
+        elif opcion == "4":
+            ip = input("Ingresa la IP del dispositivo a buscar: ").strip()
+            if not os.path.exists(topologia.SNAPSHOT_DB):
+                print(f"\n⚠️ No existe {topologia.SNAPSHOT_DB}. Ejecuta primero la opción 3.")
+            else:
+                ruta = topologia.resolver_ip(ip)
+                if ruta:
+                    print("\n=== RUTA COMPLETA (snapshot) ===")
+                    print(tabla_texto(ruta))
+                else:
+                    print("\n⚠️ La IP no aparece en el snapshot.")
+            input("\nPresiona Enter para continuar...")
+        elif opcion == "5":
+            POOL.cerrar_todo()
             break
 
 
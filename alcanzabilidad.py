@@ -0,0 +1,149 @@
+import asyncio
+import sys
+import threading
+import time
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   ALCANZABILIDAD DEL PUERTO 22 (SONDEO PARALELO, TIMEOUT ADAPTATIVO)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+# Cada host lleva su RTT suavizado (como el RTO de TCP: srtt + 4·rttvar), así que
+# un equipo que suele contestar en 5 ms no hace esperar 2 s si deja de hacerlo.
+# Si ese timeout corto vence, se reintenta una vez con TIMEOUT_MAX antes de dar el
+# puerto por cerrado: un SYN-ACK lento (plano de control ocupado, sede WAN) no
+# deja fuera a un switch sano durante TTL_INALCANZABLE.
+# Los resultados se guardan con caducidad: una IP de gestión caída se descarta
+# al instante en los siguientes saltos, rastreos y crawls.
+#
+#   python alcanzabilidad.py 10.0.0.1 10.0.0.2 ...   -> sondea en paralelo e imprime
+
+PUERTO_SSH = 22
+TIMEOUT_MIN = 0.3            # segundos; nunca se espera menos
+TIMEOUT_MAX = 2.0            # el timeout fijo de antes; también para hosts sin historial
+TTL_ALCANZABLE = 300         # segundos que se recuerda un puerto abierto
+TTL_INALCANZABLE = 60        # ... y uno cerrado o sin respuesta (se reintenta antes)
+MAX_SONDEOS_SIMULTANEOS = 256
+
+
+class _Rtt:
+    """Estimador de RTT (RFC 6298)."""
+
+    def __init__(self):
+        self.srtt = None
+        self.rttvar = None
+
+    def muestra(self, rtt):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def rto(self):
+        return None if self.srtt is None else self.srtt + 4 * self.rttvar
+
+
+class Alcanzabilidad:
+    """
+    Sondea puertos TCP con asyncio y recuerda el resultado por (host, puerto).
+    Es segura entre hilos y entre bucles de eventos (no guarda objetos de asyncio).
+    """
+
+    def __init__(self, ttl_alcanzable=TTL_ALCANZABLE, ttl_inalcanzable=TTL_INALCANZABLE):
+        self.ttl_alcanzable = ttl_alcanzable
+        self.ttl_inalcanzable = ttl_inalcanzable
+        self._lock = threading.Lock()
+        self._resultados = {}   # (host, puerto) -> (abierto, expira)
+        self._rtt = {}          # host -> _Rtt
+        self._rtt_global = _Rtt()
+
+    def timeout(self, host):
+        """RTO del host; sin historial, el doble del RTO de toda la red (o TIMEOUT_MAX)."""
+        with self._lock:
+            rto = self._rtt[host].rto() if host in self._rtt else None
+            if rto is None:
+                rto = self._rtt_global.rto()
+                rto = TIMEOUT_MAX if rto is None else 2 * rto
+        return min(max(rto, TIMEOUT_MIN), TIMEOUT_MAX)
+
+    def conocido(self, host, puerto=PUERTO_SSH):
+        """True/False si hay un resultado vigente; None si hay que sondear."""
+        with self._lock:
+            resultado = self._resultados.get((host, puerto))
+            if resultado and resultado[1] > time.monotonic():
+                return resultado[0]
+            return None
+
+    def _anotar(self, host, puerto, abierto, rtt=None):
+        with self._lock:
+            ttl = self.ttl_alcanzable if abierto else self.ttl_inalcanzable
+            self._resultados[(host, puerto)] = (abierto, time.monotonic() + ttl)
+            if rtt is not None:
+                self._rtt.setdefault(host, _Rtt()).muestra(rtt)
+                self._rtt_global.muestra(rtt)
+
+    def invalidar(self, host=None):
+        with self._lock:
+            if host is None:
+                self._resultados.clear()
+            else:
+                for clave in [c for c in self._resultados if c[0] == host]:
+                    del self._resultados[clave]
+
+    async def sondear_async(self, host, puerto=PUERTO_SSH, timeout_max=TIMEOUT_MAX):
+        """
+        Devuelve si el puerto está abierto, usando la caché si está vigente.
+        `timeout_max` acota tanto el RTO adaptativo como el reintento.
+        """
+        abierto = self.conocido(host, puerto)
+        if abierto is not None:
+            return abierto
+        timeout = min(self.timeout(host), timeout_max)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, puerto), timeout)
+            except asyncio.TimeoutError:
+                if timeout < timeout_max:
+                    timeout = timeout_max
+                    continue
+                self._anotar(host, puerto, False)
+                return False
+            except OSError:
+                # Rechazo o red inalcanzable: respuesta definitiva, no se reintenta
+                self._anotar(host, puerto, False)
+                return False
+            self._anotar(host, puerto, True, time.perf_counter() - inicio)
+            writer.close()
+            return True
+
+    async def escanear_async(self, hosts, puerto=PUERTO_SSH, concurrencia=MAX_SONDEOS_SIMULTANEOS,
+                             timeout_max=TIMEOUT_MAX):
+        """Sondea todos los hosts a la vez. Devuelve {host: abierto}."""
+        limite = asyncio.Semaphore(concurrencia)
+
+        async def uno(host):
+            async with limite:
+                return host, await self.sondear_async(host, puerto, timeout_max)
+
+        return dict(await asyncio.gather(*(uno(h) for h in dict.fromkeys(hosts))))
+
+    def escanear(self, hosts, puerto=PUERTO_SSH, timeout_max=TIMEOUT_MAX):
+        """Versión síncrona de escanear_async (desde hilos sin bucle de eventos)."""
+        hosts = list(hosts)
+        resultados = {h: self.conocido(h, puerto) for h in hosts}
+        pendientes = [h for h, r in resultados.items() if r is None]
+        if pendientes:
+            resultados.update(asyncio.run(self.escanear_async(pendientes, puerto, timeout_max=timeout_max)))
+        return resultados
+
+    def abierto(self, host, puerto=PUERTO_SSH, timeout_max=TIMEOUT_MAX):
+        return self.escanear([host], puerto, timeout_max)[host]
+
+
+if __name__ == "__main__":
+    alcance = Alcanzabilidad()
+    inicio = time.perf_counter()
+    for host, abierto in alcance.escanear(sys.argv[1:]).items():
+        print(f"{'✅' if abierto else '❌'} {host}:{PUERTO_SSH}  (timeout siguiente {alcance.timeout(host):.2f} s)")
+    print(f"⏱️ {len(sys.argv) - 1} hosts en {time.perf_counter() - inicio:.2f} s")
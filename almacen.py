@@ -0,0 +1,311 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   ALMACÉN DE INTERFACES (SQLITE) CON EXPORTACIÓN A CSV
+# ╚════════════════════════════════════════════════════════════════╝
+
+CAMPOS = ["interface", "ip_address", "ok", "method", "status", "protocol"]
+
+# Nombres de columna de los templates TextFSM -> campo del almacén
+COLUMNAS_TEMPLATE = {
+    "INTERFACE": "interface",
+    "IP_ADDRESS": "ip_address",
+    "IP-ADDRESS": "ip_address",
+    "OK": "ok",
+    "METHOD": "method",
+    "STATUS": "status",
+    "PROTOCOL": "protocol",
+    "PROTO": "protocol",
+}
+
+# Formatos CSV "anchos" históricos: columna clave + columnas por interfaz ({n} = 1, 2, ...)
+FORMATO_INT_STATUS = ("Hostname", [
+    ("INTERFACE_{n}", "interface"),
+    ("IP_ADDRESS_{n}", "ip_address"),
+    ("OK_{n}", "ok"),
+    ("METHOD_{n}", "method"),
+    ("STATUS_{n}", "status"),
+    ("PROTOCOL_{n}", "protocol"),
+])
+FORMATO_BASIC_CONFIG = ("Router_IP", [
+    ("Int{n}", "interface"),
+    ("IP{n}", "ip_address"),
+    ("Status{n}", "status"),
+])
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS dispositivos (
+    clave TEXT PRIMARY KEY,
+    actualizado TEXT
+);
+CREATE TABLE IF NOT EXISTS interfaces (
+    clave TEXT NOT NULL,
+    orden INTEGER NOT NULL,
+    interface TEXT, ip_address TEXT, ok TEXT, method TEXT, status TEXT, protocol TEXT,
+    PRIMARY KEY (clave, orden)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS eventos (
+    ts TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    interface TEXT NOT NULL,
+    status_anterior TEXT, protocol_anterior TEXT,
+    status TEXT, protocol TEXT
+);
+CREATE INDEX IF NOT EXISTS eventos_clave_ts ON eventos (clave, ts);
+"""
+
+# Columnas de un evento de cambio de estado (monitor_interfaces)
+CAMPOS_EVENTO = ["ts", "clave", "interface", "status_anterior", "protocol_anterior", "status", "protocol"]
+
+
+def registros_desde_df(df):
+    """DataFrame de TextFSM -> lista de dicts con los campos del almacén."""
+    columnas = {c: COLUMNAS_TEMPLATE[c] for c in df.columns if c in COLUMNAS_TEMPLATE}
+    return [
+        {campo: str(fila[col]) for col, campo in columnas.items()}
+        for fila in df.to_dict("records")
+    ]
+
+
+def registros_desde_columnas(columnas):
+    """{columna TextFSM: [valores]} (parser_rapido) -> lista de dicts, sin pasar por pandas."""
+    campos = {COLUMNAS_TEMPLATE[c]: v for c, v in columnas.items() if c in COLUMNAS_TEMPLATE}
+    return [dict(zip(campos, valores)) for valores in zip(*campos.values())]
+
+
+def leer_cabecera(ruta_csv):
+    """Primera fila del CSV ([] si está vacío)."""
+    with open(ruta_csv, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+@contextmanager
+def escritura_atomica(ruta):
+    """
+    Abre un temporal único junto a `ruta` y lo cambia por ella al terminar:
+    un lector nunca ve el archivo a medias y dos procesos exportando a la vez
+    no escriben en el mismo temporal.
+    """
+    tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp, ruta)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class Almacen:
+    """
+    Guarda las interfaces de cada equipo indexadas por clave (hostname o IP).
+    Cada guardado es un upsert de ese equipo: no se reescribe nada más.
+    SQLite en modo WAL admite varios procesos escribiendo a la vez.
+    """
+
+    def __init__(self, ruta_db, formato=FORMATO_INT_STATUS, csv_legado=None):
+        self.ruta_db = ruta_db
+        self.formato = formato
+        nuevo = not os.path.exists(ruta_db)
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(ESQUEMA)
+        # Primera vez: migrar el CSV ancho que ya existía
+        if nuevo and csv_legado and os.path.exists(csv_legado):
+            try:
+                self.importar_csv(csv_legado)
+            except ValueError as e:
+                print(f"⚠ {e}")
+
+    def cabecera_valida(self, cabecera):
+        """True si `cabecera` es la del CSV ancho de self.formato (clave + columnas por interfaz)."""
+        col_clave, columnas = self.formato
+        patron = re.compile("|".join(re.escape(col).replace(r"\{n\}", r"\d+") for col, _ in columnas))
+        return bool(cabecera) and cabecera[0] == col_clave and all(patron.fullmatch(c) for c in cabecera[1:])
+
+    def _comprobar_destino(self, ruta_csv, valida):
+        """No sobrescribir un CSV existente con otro formato (p. ej. un inventario con el mismo nombre)."""
+        if not os.path.exists(ruta_csv):
+            return
+        cabecera = leer_cabecera(ruta_csv)
+        if cabecera and not valida(cabecera):
+            raise ValueError(
+                f"{ruta_csv} tiene otro formato ({', '.join(cabecera[:4])}, ...); no se sobrescribe"
+            )
+
+    def _conectar(self):
+        # Una conexión por operación: seguro entre hilos y procesos
+        con = sqlite3.connect(self.ruta_db, timeout=30, isolation_level=None)
+        con.execute("PRAGMA busy_timeout=30000")
+        return closing(con)
+
+    def guardar(self, clave, registros):
+        """Inserta o reemplaza las interfaces de un equipo."""
+        self.guardar_varios([(clave, registros)])
+
+    def guardar_varios(self, equipos):
+        """equipos: iterable de (clave, registros). Todo en una transacción."""
+        ahora = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._conectar() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                for clave, registros in equipos:
+                    self._reemplazar(con, clave, registros, ahora)
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _reemplazar(con, clave, registros, ahora):
+        con.execute("DELETE FROM interfaces WHERE clave = ?", (clave,))
+        con.executemany(
+            f"INSERT INTO interfaces (clave, orden, {', '.join(CAMPOS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(CAMPOS))})",
+            [(clave, i, *(r.get(c, "") for c in CAMPOS)) for i, r in enumerate(registros, 1)],
+        )
+        con.execute(
+            "INSERT INTO dispositivos VALUES (?, ?) "
+            "ON CONFLICT(clave) DO UPDATE SET actualizado = excluded.actualizado",
+            (clave, ahora),
+        )
+
+    def registrar_eventos(self, eventos, completos=()):
+        """
+        Anota los cambios de estado y actualiza sólo esas filas de `interfaces`.
+        eventos: dicts con CAMPOS_EVENTO (sin ts). completos: (clave, registros) de
+        equipos cuyo juego de interfaces cambió, que se reescriben enteros.
+        Todo en una transacción.
+        """
+        ahora = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._conectar() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                for clave, registros in completos:
+                    self._reemplazar(con, clave, registros, ahora)
+                con.executemany(
+                    f"INSERT INTO eventos ({', '.join(CAMPOS_EVENTO)}) VALUES ({', '.join('?' * len(CAMPOS_EVENTO))})",
+                    [(ahora, *(e.get(c, "") for c in CAMPOS_EVENTO[1:])) for e in eventos],
+                )
+                con.executemany(
+                    "UPDATE interfaces SET status = ?, protocol = ? WHERE clave = ? AND interface = ?",
+                    [(e["status"], e["protocol"], e["clave"], e["interface"]) for e in eventos if e["status"]],
+                )
+                con.executemany(
+                    "UPDATE dispositivos SET actualizado = ? WHERE clave = ?",
+                    [(ahora, c) for c in {e["clave"] for e in eventos}],
+                )
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+
+    def eventos(self, clave=None, desde=None):
+        """Eventos en orden de llegada, opcionalmente de un equipo y desde un ts ('%Y-%m-%d %H:%M:%S')."""
+        condiciones, args = [], []
+        if clave:
+            condiciones.append("clave = ?")
+            args.append(clave)
+        if desde:
+            condiciones.append("ts >= ?")
+            args.append(desde)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        with self._conectar() as con:
+            filas = con.execute(f"SELECT {', '.join(CAMPOS_EVENTO)} FROM eventos {where} ORDER BY rowid", args)
+            return [dict(zip(CAMPOS_EVENTO, f)) for f in filas]
+
+    def claves(self):
+        with self._conectar() as con:
+            return [c for (c,) in con.execute("SELECT clave FROM dispositivos ORDER BY rowid")]
+
+    def interfaces(self, clave):
+        with self._conectar() as con:
+            filas = con.execute(
+                f"SELECT {', '.join(CAMPOS)} FROM interfaces WHERE clave = ? ORDER BY orden", (clave,)
+            ).fetchall()
+        return [dict(zip(CAMPOS, f)) for f in filas]
+
+    def _recorrer(self, con):
+        """Genera (clave, registros) en orden, leyendo la tabla una sola vez."""
+        actual, registros = None, []
+        consulta = con.execute(
+            f"SELECT i.clave, {', '.join('i.' + c for c in CAMPOS)} "
+            "FROM interfaces i JOIN dispositivos d ON d.clave = i.clave "
+            "ORDER BY d.rowid, i.orden"
+        )
+        for clave, *valores in consulta:
+            if clave != actual and actual is not None:
+                yield actual, registros
+                registros = []
+            actual = clave
+            registros.append(dict(zip(CAMPOS, valores)))
+        if actual is not None:
+            yield actual, registros
+
+    def exportar_csv(self, ruta_csv):
+        """
+        Escribe el CSV ancho histórico (una fila por equipo) a partir del almacén.
+        Lanza ValueError si `ruta_csv` ya existe con otro formato.
+        """
+        col_clave, columnas = self.formato
+        self._comprobar_destino(ruta_csv, self.cabecera_valida)
+        with self._conectar() as con:
+            n_max = con.execute(
+                "SELECT COALESCE(MAX(c), 0) FROM (SELECT COUNT(*) c FROM interfaces GROUP BY clave)"
+            ).fetchone()[0]
+            cabecera = [col_clave] + [col.format(n=n) for n in range(1, n_max + 1) for col, _ in columnas]
+            # Reemplazo atómico: un lector nunca ve el CSV a medias
+            with escritura_atomica(ruta_csv) as f:
+                writer = csv.DictWriter(f, fieldnames=cabecera, restval="")
+                writer.writeheader()
+                for clave, registros in self._recorrer(con):
+                    fila = {col_clave: clave}
+                    for n, r in enumerate(registros, 1):
+                        for col, campo in columnas:
+                            fila[col.format(n=n)] = r[campo]
+                    writer.writerow(fila)
+        print(f"✅ CSV exportado en {ruta_csv}")
+
+    def exportar_csv_largo(self, ruta_csv):
+        """Escribe el CSV normalizado: una fila por interfaz (ver esquema_interfaces)."""
+        cabecera = ["hostname", "orden"] + CAMPOS
+        self._comprobar_destino(ruta_csv, lambda c: c == cabecera)
+        with self._conectar() as con, escritura_atomica(ruta_csv) as f:
+            writer = csv.writer(f)
+            writer.writerow(cabecera)
+            writer.writerows(con.execute(
+                f"SELECT i.clave, i.orden, {', '.join('i.' + c for c in CAMPOS)} "
+                "FROM interfaces i JOIN dispositivos d ON d.clave = i.clave "
+                "ORDER BY d.rowid, i.orden"
+            ))
+        print(f"✅ CSV (una fila por interfaz) exportado en {ruta_csv}")
+
+    def importar_csv(self, ruta_csv):
+        """Carga un CSV ancho histórico en el almacén (ValueError si es de otro formato)."""
+        col_clave, columnas = self.formato
+        equipos = []
+        with open(ruta_csv, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames and not self.cabecera_valida(reader.fieldnames):
+                raise ValueError(
+                    f"{ruta_csv} no es un CSV {col_clave}/{columnas[0][0].format(n=1)}...; no se importa"
+                )
+            for fila in reader:
+                clave = fila.get(col_clave)
+                if not clave:
+                    continue
+                registros, n = [], 1
+                while columnas[0][0].format(n=n) in fila:
+                    r = {campo: fila.get(col.format(n=n)) or "" for col, campo in columnas}
+                    if r["interface"]:
+                        registros.append(r)
+                    n += 1
+                equipos.append((clave, registros))
+        self.guardar_varios(equipos)
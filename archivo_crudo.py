@@ -0,0 +1,261 @@
+import argparse
+import csv
+import gzip
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   ARCHIVO DE SALIDAS CRUDAS (DIRECCIONADO POR CONTENIDO)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+# Cada captura (equipo, comando, instante) apunta al SHA-256 de su salida; una
+# salida que no cambia se guarda una sola vez, comprimida con zstd si está
+# instalado (pip install zstandard) o con gzip. El índice es un SQLite.
+#
+#   capturas/indice.db
+#   capturas/objetos/ab/ab12...ef.zst   (o .gz)
+#
+#   python archivo_crudo.py listar --equipo R1
+#   python archivo_crudo.py reparsear --plantilla Value.txt --comando "show ip interface brief" --salida r.csv
+#
+# ARCHIVO_CRUDO=dir cambia la carpeta; ARCHIVO_CRUDO= (vacío) desactiva el archivado.
+
+DIRECTORIO = "capturas"
+NIVEL_ZSTD = 10
+NIVEL_GZIP = 6
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS capturas (
+    ts TEXT NOT NULL,
+    equipo TEXT NOT NULL,
+    comando TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS capturas_equipo_comando ON capturas (equipo, comando, ts);
+"""
+CAMPOS_CAPTURA = ["ts", "equipo", "comando", "hash", "bytes"]
+
+
+def _comprimir(datos):
+    """Devuelve (extensión, bytes comprimidos)."""
+    try:
+        import zstandard
+    except ImportError:
+        return ".gz", gzip.compress(datos, NIVEL_GZIP)
+    return ".zst", zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(datos)
+
+
+def _descomprimir(ruta):
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    if ruta.endswith(".zst"):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(datos)
+    return gzip.decompress(datos)
+
+
+def ruta_objeto(directorio, hash_):
+    """Ruta del objeto existente (.zst o .gz), o None."""
+    base = os.path.join(directorio, "objetos", hash_[:2], hash_)
+    for ext in (".zst", ".gz"):
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+
+def leer_objeto(directorio, hash_):
+    ruta = ruta_objeto(directorio, hash_)
+    if ruta is None:
+        raise KeyError(hash_)
+    return _descomprimir(ruta).decode("utf-8")
+
+
+class ArchivoCrudo:
+    """Guarda y recupera salidas de comandos por equipo, comando e instante."""
+
+    def __init__(self, directorio=DIRECTORIO):
+        self.directorio = directorio
+        os.makedirs(os.path.join(directorio, "objetos"), exist_ok=True)
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(ESQUEMA)
+
+    def _conectar(self):
+        # Una conexión por operación, como almacen.Almacen
+        con = sqlite3.connect(os.path.join(self.directorio, "indice.db"), timeout=30, isolation_level=None)
+        con.execute("PRAGMA busy_timeout=30000")
+        return closing(con)
+
+    def guardar(self, equipo, comando, salida, ts=None):
+        """Archiva una captura y devuelve su hash. El contenido sólo se escribe si es nuevo."""
+        datos = salida.encode("utf-8")
+        hash_ = hashlib.sha256(datos).hexdigest()
+        if ruta_objeto(self.directorio, hash_) is None:
+            ext, comprimido = _comprimir(datos)
+            ruta = os.path.join(self.directorio, "objetos", hash_[:2], hash_ + ext)
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            tmp = f"{ruta}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(comprimido)
+            os.replace(tmp, ruta)
+        with self._conectar() as con:
+            con.execute(
+                "INSERT INTO capturas VALUES (?, ?, ?, ?, ?)",
+                (ts or time.strftime("%Y-%m-%d %H:%M:%S"), equipo, comando.strip(), hash_, len(datos)),
+            )
+        return hash_
+
+    def leer(self, hash_):
+        return leer_objeto(self.directorio, hash_)
+
+    def capturas(self, equipo=None, comando=None, desde=None, solo_ultima=False):
+        """Capturas del índice en orden; `solo_ultima` deja la más reciente por equipo y comando."""
+        condiciones, args = [], []
+        for campo, valor, op in (("equipo", equipo, "="), ("comando", comando, "="), ("ts", desde, ">=")):
+            if valor:
+                condiciones.append(f"{campo} {op} ?")
+                args.append(valor.strip() if campo == "comando" else valor)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        with self._conectar() as con:
+            filas = [dict(zip(CAMPOS_CAPTURA, f)) for f in con.execute(
+                f"SELECT {', '.join(CAMPOS_CAPTURA)} FROM capturas {where} ORDER BY rowid", args)]
+        if solo_ultima:
+            ultimas = {}
+            for f in filas:
+                ultimas[(f["equipo"], f["comando"])] = f
+            filas = list(ultimas.values())
+        return filas
+
+
+_ARCHIVO = None
+
+
+def archivo_por_defecto():
+    """ArchivoCrudo de ARCHIVO_CRUDO (o ./capturas); None si está desactivado."""
+    global _ARCHIVO
+    directorio = os.environ.get("ARCHIVO_CRUDO", DIRECTORIO)
+    if not directorio:
+        return None
+    if _ARCHIVO is None or _ARCHIVO.directorio != directorio:
+        _ARCHIVO = ArchivoCrudo(directorio)
+    return _ARCHIVO
+
+
+def archivar(equipo, comando, salida):
+    """Enganche para los scripts: archiva la salida sin dejar que un fallo del archivo corte la recolección."""
+    try:
+        archivo = archivo_por_defecto()
+        if archivo is not None and salida:
+            return archivo.guardar(equipo, comando, salida)
+    except Exception as e:
+        print(f"⚠ No se pudo archivar la salida de {equipo}: {e}")
+    return None
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   RE-PARSEO MASIVO (SIN ACCESO A EQUIPOS)
+# ╚════════════════════════════════════════════════════════════════╝
+
+def _parsear_objeto(directorio, hash_, plantilla):
+    """Se ejecuta en otro proceso: descomprime un objeto y lo pasa por la plantilla."""
+    from plantillas import PLANTILLAS, REGISTRO
+    if plantilla not in PLANTILLAS:
+        REGISTRO.registrar(plantilla, plantilla)
+    try:
+        cabecera, filas = REGISTRO.parsear(plantilla, leer_objeto(directorio, hash_))
+    except Exception as e:
+        return hash_, None, f"{type(e).__name__}: {e}"
+    return hash_, cabecera, filas
+
+
+def reparsear(plantilla, archivo=None, comando=None, equipo=None, desde=None, solo_ultima=False, workers=None):
+    """
+    Pasa la plantilla (nombre de plantillas.PLANTILLAS o ruta a un .textfsm) por
+    las capturas elegidas en un pool de procesos. Cada contenido distinto se
+    parsea una vez. Genera (captura, cabecera, filas); si falla, cabecera es None
+    y filas el mensaje de error.
+    """
+    archivo = archivo or archivo_por_defecto() or ArchivoCrudo()
+    capturas = archivo.capturas(equipo, comando, desde, solo_ultima)
+    hashes = list(dict.fromkeys(c["hash"] for c in capturas))
+    resultados = {}
+    if hashes:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for hash_, cabecera, filas in pool.map(
+                _parsear_objeto, [archivo.directorio] * len(hashes), hashes, [plantilla] * len(hashes),
+                chunksize=max(1, len(hashes) // ((workers or os.cpu_count() or 1) * 4)),
+            ):
+                resultados[hash_] = (cabecera, filas)
+    for c in capturas:
+        cabecera, filas = resultados[c["hash"]]
+        yield c, cabecera, filas
+
+
+def reparsear_a_csv(plantilla, ruta_csv, **filtros):
+    """Escribe una fila por registro: equipo, ts, comando + columnas de la plantilla."""
+    n_capturas = n_filas = errores = 0
+    tmp = ruta_csv + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = None
+        for captura, cabecera, filas in reparsear(plantilla, **filtros):
+            n_capturas += 1
+            if cabecera is None:
+                errores += 1
+                print(f"⚠ {captura['equipo']} {captura['ts']}: {filas}")
+                continue
+            if writer is None:
+                writer = csv.writer(f)
+                writer.writerow(["equipo", "ts", "comando"] + cabecera)
+            for fila in filas:
+                writer.writerow([captura["equipo"], captura["ts"], captura["comando"]] + fila)
+                n_filas += 1
+    os.replace(tmp, ruta_csv)
+    print(f"✅ {n_capturas} capturas, {n_filas} registros, {errores} errores -> {ruta_csv}")
+    return n_capturas, n_filas, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archivo de salidas crudas de los equipos.")
+    parser.add_argument("--directorio", default=os.environ.get("ARCHIVO_CRUDO") or DIRECTORIO)
+    sub = parser.add_subparsers(dest="accion", required=True)
+
+    def filtros(p):
+        p.add_argument("--equipo")
+        p.add_argument("--comando")
+        p.add_argument("--desde", help="'%%Y-%%m-%%d %%H:%%M:%%S'")
+        p.add_argument("--ultima", action="store_true", help="sólo la captura más reciente por equipo y comando")
+
+    p = sub.add_parser("listar", help="capturas del índice")
+    filtros(p)
+    p = sub.add_parser("mostrar", help="imprime una salida archivada")
+    p.add_argument("hash")
+    p = sub.add_parser("reparsear", help="pasa una plantilla TextFSM por las capturas")
+    filtros(p)
+    p.add_argument("--plantilla", required=True, help="nombre registrado (p. ej. Value.txt) o ruta .textfsm")
+    p.add_argument("--salida", required=True, help="CSV de resultado")
+    p.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    archivo = ArchivoCrudo(args.directorio)
+    if args.accion == "mostrar":
+        print(archivo.leer(args.hash))
+    elif args.accion == "listar":
+        for c in archivo.capturas(args.equipo, args.comando, args.desde, args.ultima):
+            print(f"{c['ts']}  {c['equipo']:<20} {c['comando']:<30} {c['hash'][:12]}  {c['bytes']} B")
+    else:
+        _, _, errores = reparsear_a_csv(
+            args.plantilla, args.salida, archivo=archivo, comando=args.comando, equipo=args.equipo,
+            desde=args.desde, solo_ultima=args.ultima, workers=args.workers,
+        )
+        return 1 if errores else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
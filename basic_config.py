@@ -1,30 +1,16 @@
 import os
-import sys
-import serial
-import serial.tools.list_ports
 import time
-import pandas as pd
-import textfsm
-
-# ╔════════════════════════════════════════════════════════════════╗
-#   CONFIGURACIÓN AUTOMÁTICA DE NTC-TEMPLATES
-# ╚════════════════════════════════════════════════════════════════╝
-
-def setup_ntc_templates():
-    """Detecta automáticamente la ruta de ntc_templates y la asigna a NET_TEXTFSM."""
-    try:
-        import ntc_templates
-        templates_path = os.path.join(os.path.dirname(ntc_templates.__file__), "templates")
-        if os.path.isdir(templates_path):
-            os.environ["NET_TEXTFSM"] = templates_path
-            print(f"✅ NET_TEXTFSM detectado: {templates_path}")
-        else:
-            print("⚠ No se encontró carpeta templates dentro de ntc_templates.")
-    except ImportError:
-        print("❌ ntc-templates no está instalado. Instálalo con: pip install ntc-templates")
-        sys.exit(1)
-
-setup_ntc_templates()
+from parser_rapido import parsear_en_flujo, parsear_ip_int_brief
+from archivo_crudo import archivar
+from almacen import Almacen, FORMATO_BASIC_CONFIG, registros_desde_df
+from grabacion import GrabadorSerial
+from telemetria import medir_comando
+from flujo import lineas, sin_eco
+from transporte_serial import TIMEOUT_COMANDO, enviar_comando
+
+# CSV ancho Router_IP/IntN/IPN/StatusN (BASIC_CONFIG_CSV para cambiarlo). No es el
+# Data.csv del repositorio, que es un inventario con otro formato.
+CSV_POR_DEFECTO = "routers_ip.csv"
 
 # ╔════════════════════════════════════════════════════════════════╗
 #   FUNCIONES DE SERIAL Y COMUNICACIÓN
@@ -32,6 +18,7 @@ setup_ntc_templates()
 
 def listar_puertos():
     """Lista los puertos disponibles."""
+    import serial.tools.list_ports
     return list(serial.tools.list_ports.comports())
 
 def conectar_dispositivo():
@@ -48,7 +35,10 @@ def conectar_dispositivo():
 
         port = puertos[0].device
         try:
+            import serial
             ser = serial.Serial(port, baudrate=9600, timeout=1)
+            if os.environ.get("GRABAR_SESIONES"):
+                ser = GrabadorSerial(ser)
             time.sleep(2)
             print(f"✅ Conectado a {port}")
             return ser
@@ -56,75 +46,58 @@ def conectar_dispositivo():
             print(f"❌ Error al conectar en {port}: {e}")
             time.sleep(2)
 
-def send_command(ser, command, base_delay=2):
-    """Envía un comando al router y devuelve la salida limpia."""
-    ser.reset_input_buffer()
-    ser.write((command + "\r\n").encode())
-    time.sleep(base_delay)
+@medir_comando
+def send_command(ser, command, timeout=TIMEOUT_COMANDO):
+    """Envía un comando al router y devuelve la salida limpia (lee hasta ver el prompt)."""
+    # Limpieza línea a línea mientras llega la respuesta (sin el eco del comando)
+    return "\n".join(sin_eco(lineas(enviar_comando(ser, command, timeout=timeout)), command)).strip()
 
-    output = ser.read(ser.in_waiting).decode(errors="ignore")
-    while True:
-        time.sleep(0.5)
-        more = ser.read(ser.in_waiting).decode(errors="ignore")
-        if not more:
-            break
-        output += more
-
-    # Limpieza
-    lines = output.splitlines()
-    clean_lines = [l for l in lines if not l.strip().lower().startswith(command.lower())]
-    return "\n".join(clean_lines).strip()
+@medir_comando
+def leer_ip_int_brief(ser, command, timeout=TIMEOUT_COMANDO):
+    """Como send_command para show ip interface brief, pero parsea cada línea mientras llega. Devuelve (salida, columnas o None)."""
+    return parsear_en_flujo(sin_eco(lineas(enviar_comando(ser, command, timeout=timeout)), command))
 
 # ╔════════════════════════════════════════════════════════════════╗
 #   FUNCIONES DE PARSEO Y CSV
 # ╚════════════════════════════════════════════════════════════════╝
 
-def parse_show_ip_interface_brief(raw_output):
-    """Parsea show ip interface brief usando TextFSM."""
-    template_path = os.path.join(os.environ["NET_TEXTFSM"], "cisco_ios_show_ip_interface_brief.textfsm")
-    with open(template_path) as tpl:
-        fsm = textfsm.TextFSM(tpl)
-        parsed_data = fsm.ParseText(raw_output)
+def parse_show_ip_interface_brief(raw_output, columnas=None):
+    """Parsea show ip interface brief (parser rápido con respaldo TextFSM)."""
+    import pandas as pd
+    headers, columnas = parsear_ip_int_brief(raw_output, columnas=columnas)
+    return pd.DataFrame(columnas, columns=headers)
 
-    headers = fsm.header
-    return pd.DataFrame(parsed_data, columns=headers)
+def abrir_almacen(csv_path):
+    """Almacén SQLite junto al CSV (mismo nombre, extensión .db)."""
+    ruta_db = os.path.splitext(csv_path)[0] + ".db"
+    return Almacen(ruta_db, FORMATO_BASIC_CONFIG, csv_legado=csv_path)
 
 def obtener_interfaces_y_guardar(ser, csv_path):
-    """Ejecuta show ip interface brief, organiza datos en una sola línea y guarda en CSV."""
+    """Ejecuta show ip interface brief y guarda las interfaces del router en el almacén."""
     router_ip = input("\n🌐 Ingresa la IP del router: ").strip()
     if not router_ip:
         print("⚠ IP inválida.")
         return
 
     print("\n📡 Obteniendo información de interfaces...")
-    send_command(ser, "terminal length 0")
-    output = send_command(ser, "show ip interface brief", base_delay=3)
+    try:
+        send_command(ser, "terminal length 0")
+        output, columnas = leer_ip_int_brief(ser, "show ip interface brief")
+    except TimeoutError as e:
+        # Salida incompleta: guardarla borraría interfaces del router en el almacén
+        print(f"⚠ {e}. No se guardan datos.")
+        return
+    # La salida cruda queda archivada (archivo_crudo) para poder re-parsearla sin el equipo
+    archivar(router_ip, "show ip interface brief", output)
 
     try:
-        df_interfaces = parse_show_ip_interface_brief(output)
+        df_interfaces = parse_show_ip_interface_brief(output, columnas)
         print("\n📋 Interfaces detectadas:")
         print(df_interfaces)
 
-        # Aplanar los datos: poner cada interfaz en columnas horizontales
-        row_data = {"Router_IP": router_ip}
-        for i, row in df_interfaces.iterrows():
-            idx = i + 1
-            row_data[f"Int{idx}"] = row["INTERFACE"]
-            row_data[f"IP{idx}"] = row["IP-ADDRESS"]
-            row_data[f"Status{idx}"] = row["STATUS"]
-
-        # Convertir a DataFrame de una sola fila
-        df_row = pd.DataFrame([row_data])
-
-        # Si el CSV ya existe, agregar la nueva fila
-        if os.path.exists(csv_path):
-            df_csv = pd.read_csv(csv_path)
-            df_csv = pd.concat([df_csv, df_row], ignore_index=True)
-        else:
-            df_csv = df_row
-
-        df_csv.to_csv(csv_path, index=False)
-        print(f"\n✅ Datos guardados en una sola línea en: {csv_path}")
+        # Upsert por IP del router en el almacén (el CSV se exporta al salir)
+        abrir_almacen(csv_path).guardar(router_ip, registros_desde_df(df_interfaces))
+        print(f"\n✅ Datos guardados para {router_ip}")
 
     except Exception as e:
         print(f"⚠ Error al parsear interfaces: {e}")
@@ -150,7 +123,7 @@ def mostrar_menu():
 
 if __name__ == "__main__":
     ser = conectar_dispositivo()
-    csv_path = r"C:\Users\jessu\OneDrive\Documentos\venv\Data.csv"
+    csv_path = os.environ.get("BASIC_CONFIG_CSV", CSV_POR_DEFECTO)
 
     while True:
         mostrar_menu()
@@ -160,6 +133,10 @@ if __name__ == "__main__":
             obtener_interfaces_y_guardar(ser, csv_path)
             input("\nPresiona ENTER para volver al menú...")
         elif opcion == "0":
+            try:
+                abrir_almacen(csv_path).exportar_csv(csv_path)
+            except ValueError as e:
+                print(f"⚠ {e}")
             print("👋 Saliendo y cerrando conexión...")
             ser.close()
             break
@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import Get_switch
+from almacen import Almacen
+from flujo import leer_netmiko
+from grabacion import NetmikoSimulado, SerialSimulado, conectar_simulado, guardar_grabacion, ruta_grabacion
+from parser_rapido import parsear_ip_int_brief
+from plantillas import parsear
+from ssh_pool import PoolSSH
+from tablas_cache import CacheTablas
+from transporte_serial import enviar_comando
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   BENCHMARKS SIN HARDWARE (SESIONES GRABADAS O SINTÉTICAS)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+#   python benchmark.py                  -> todos los benchmarks, escala de latencia 0.01
+#   python benchmark.py --escala 1       -> latencias grabadas reales
+#   python benchmark.py --grabaciones dir -> usa grabaciones reales (GRABAR_SESIONES=1)
+#   python benchmark.py --json           -> resultados en JSON
+
+TAMANOS_FLOTA = (10, 100, 1000, 10000)
+
+
+def mac_n(n):
+    h = f"{0x001b00000000 + n:012x}"
+    return f"{h[0:4]}.{h[4:8]}.{h[8:12]}"
+
+
+def salida_ip_int_brief(n_interfaces, prompt="Router#"):
+    lineas = ["Interface                  IP-Address      OK? Method Status                Protocol"]
+    for i in range(n_interfaces):
+        estado = random.choice(["up                    up", "administratively down down", "down                  down"])
+        lineas.append(f"GigabitEthernet0/{i:<14} 10.{i // 250}.{i % 250}.1      YES manual {estado}")
+    return "\r\n".join(["show ip interface brief"] + lineas + [prompt])
+
+
+def topologia_sintetica(directorio, n_hosts=500, duracion=0.05):
+    """
+    core (10.0.0.1) -Gi1/0/1-> dist (10.0.0.2) -Gi1/0/1-> acceso (10.0.0.3).
+    Los hosts 192.168.x.y cuelgan de puertos de acceso. Devuelve las IPs de los hosts.
+    """
+    ips = [f"192.168.{i // 250}.{i % 250 + 1}" for i in range(n_hosts)]
+    equipos = [("10.0.0.1", "CORE", "10.0.0.2"), ("10.0.0.2", "DIST", "10.0.0.3"), ("10.0.0.3", "ACC", None)]
+    for host, nombre, siguiente in equipos:
+        arp = "\n".join(f"Internet  {ip}   3   {mac_n(i)}  ARPA   Vlan10" for i, ip in enumerate(ips))
+        puertos = (lambda i: "Gi1/0/1") if siguiente else (lambda i: f"Gi1/0/{i % 48 + 2}")
+        mac = "\n".join(f"  10    {mac_n(i)}    DYNAMIC     {puertos(i)}" for i in range(n_hosts))
+        cdp = (
+            "-------------------------\nDevice ID: SIGUIENTE\nEntry address(es): \n"
+            f"  IP address: {siguiente}\nPlatform: cisco,  Capabilities: Switch IGMP \n"
+            "Interface: GigabitEthernet1/0/1,  Port ID (outgoing port): Gi1/0/49\n"
+        ) if siguiente else ""
+        # Consultas filtradas (una línea) para la estrategia de tablas_cache
+        filtradas = [
+            {"comando": f"show ip arp {ip}", "salida": f"Internet  {ip}   3   {mac_n(i)}  ARPA   Vlan10", "duracion": duracion}
+            for i, ip in enumerate(ips)
+        ] + [
+            {"comando": f"show mac address-table address {mac_n(i)}",
+             "salida": f"  10    {mac_n(i)}    DYNAMIC     {puertos(i)}", "duracion": duracion}
+            for i in range(n_hosts)
+        ] + [
+            {"comando": f"show cdp neighbors GigabitEthernet1/0/{p} detail", "salida": cdp if p == 1 else "", "duracion": duracion}
+            for p in range(1, 50)
+        ]
+        guardar_grabacion({
+            "tipo": "ssh", "host": host, "prompt": f"{nombre}#",
+            "interacciones": [
+                {"comando": "show ip arp", "salida": arp, "duracion": duracion},
+                {"comando": "show mac address-table", "salida": mac, "duracion": duracion},
+                {"comando": "show cdp neighbors detail", "salida": cdp, "duracion": duracion},
+                {"comando": "show ip interface brief", "salida": "", "duracion": duracion},
+            ] + filtradas,
+        }, ruta_grabacion("ssh", host, directorio))
+    return ips
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def bench_comando_serial(escala, repeticiones=20):
+    """Latencia de send_command contra un router serie simulado (respuesta grabada de 50 ms)."""
+    grabacion = {"tipo": "serial", "host": "COM_SIM", "interacciones": [
+        {"comando": "show ip interface brief", "salida": salida_ip_int_brief(24), "duracion": 0.05},
+    ]}
+    ser = SerialSimulado(grabacion, escala=escala)
+    tiempos = medir(lambda: "".join(enviar_comando(ser, "show ip interface brief")), repeticiones)
+    return latencias(tiempos)
+
+
+def bench_comando_ssh(escala, repeticiones=20):
+    """Latencia de un comando por SSH (leer_netmiko) contra un equipo simulado (respuesta grabada de 50 ms)."""
+    grabacion = {"tipo": "ssh", "host": "SSH_SIM", "prompt": "Router#", "interacciones": [
+        {"comando": "show ip interface brief", "salida": salida_ip_int_brief(24), "duracion": 0.05},
+    ]}
+    conn = NetmikoSimulado(grabacion, escala=escala)
+    tiempos = medir(lambda: "".join(leer_netmiko(conn, "show ip interface brief")), repeticiones)
+    return latencias(tiempos)
+
+
+def latencias(tiempos):
+    return {
+        "latencia_media_ms": round(statistics.mean(tiempos) * 1000, 2),
+        "latencia_p95_ms": round(sorted(tiempos)[int(len(tiempos) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def bench_rastreo(escala, directorio=None, n_rastreos=200, arbol=False):
+    """Rastreos por segundo con rastrear_lote (o rastrear_arbol) sobre equipos simulados."""
+    with tempfile.TemporaryDirectory() as tmp:
+        if directorio:
+            with open(os.path.join(directorio, "ips.txt"), encoding="utf-8") as f:
+                ips = [l.strip() for l in f if l.strip()]
+        else:
+            directorio = tmp
+            ips = topologia_sintetica(tmp, duracion=0.05)
+        ips = (ips * (n_rastreos // len(ips) + 1))[:n_rastreos]
+
+        # Se sustituyen el pool, la caché y el sondeo de Get_switch sólo durante la medida
+        originales = Get_switch.POOL, Get_switch.CACHE, Get_switch.puerto_abierto
+        Get_switch.POOL = PoolSSH(conectar=conectar_simulado(directorio, escala=escala, latencia_conexion=0.5))
+        Get_switch.CACHE = CacheTablas()
+        Get_switch.puerto_abierto = lambda *a, **k: True
+        try:
+            raiz = {**Get_switch.ROOT_SWITCH, "host": "10.0.0.1"}
+            inicio = time.perf_counter()
+            if arbol:
+                filas = Get_switch.filas_por_ip(ips, Get_switch.rastrear_arbol(raiz, ips))
+            else:
+                filas = Get_switch.rastrear_lote(raiz, ips)
+            total = time.perf_counter() - inicio
+        finally:
+            Get_switch.POOL.cerrar_todo()
+            Get_switch.POOL, Get_switch.CACHE, Get_switch.puerto_abierto = originales
+    encontrados = {f["ip_buscada"] for f in filas if f.get("encontrado")}
+    return {
+        "rastreos": len(ips),
+        "encontrados": len(encontrados),
+        "segundos": round(total, 3),
+        "rastreos_por_segundo": round(len(ips) / total, 1),
+    }
+
+
+def bench_parseo(n_interfaces=10000):
+    """Líneas por segundo: parser rápido frente a TextFSM (Value.txt)."""
+    salida = salida_ip_int_brief(n_interfaces)
+    rapido = min(medir(lambda: parsear_ip_int_brief(salida, "Value.txt"), 3))
+    fsm = min(medir(lambda: parsear("Value.txt", salida), 3))
+    return {
+        "lineas": n_interfaces,
+        "rapido_lineas_por_s": int(n_interfaces / rapido),
+        "textfsm_lineas_por_s": int(n_interfaces / fsm),
+    }
+
+
+def bench_guardado(tamanos=TAMANOS_FLOTA, n_interfaces=8):
+    """Tiempo de guardar un equipo más y de exportar el CSV con N equipos en el almacén."""
+    registros = [
+        {"interface": f"Gi0/{i}", "ip_address": "unassigned", "ok": "YES",
+         "method": "NVRAM", "status": "up", "protocol": "up"}
+        for i in range(n_interfaces)
+    ]
+    resultados = {}
+    for n in tamanos:
+        with tempfile.TemporaryDirectory() as tmp:
+            almacen = Almacen(os.path.join(tmp, "bench.db"))
+            almacen.guardar_varios((f"R{i}", registros) for i in range(n))
+            guardado = statistics.median(medir(lambda: almacen.guardar(f"R{n // 2}", registros), 20))
+            exportado = min(medir(lambda: almacen.exportar_csv(os.path.join(tmp, "bench.csv")), 1))
+        resultados[n] = {
+            "guardar_ms": round(guardado * 1000, 2),
+            "exportar_csv_ms": round(exportado * 1000, 2),
+        }
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de los flujos serial/SSH sin hardware.")
+    parser.add_argument("--escala", type=float, default=0.01, help="multiplicador de las latencias grabadas")
+    parser.add_argument("--grabaciones", help="directorio con grabaciones reales (ssh_<host>.json e ips.txt)")
+    parser.add_argument("--json", action="store_true", help="imprime los resultados en JSON")
+    args = parser.parse_args()
+
+    # Con --json, los mensajes de los rastreos van a stderr para que stdout sea JSON puro
+    salida = sys.stderr if args.json else sys.stdout
+    with contextlib.redirect_stdout(salida):
+        resultados = {
+            "comando_serial": bench_comando_serial(args.escala),
+            "comando_ssh": bench_comando_ssh(args.escala),
+            "rastreo": bench_rastreo(args.escala, args.grabaciones),
+            "rastreo_arbol": bench_rastreo(args.escala, args.grabaciones, arbol=True),
+            "parseo": bench_parseo(),
+            "guardado": bench_guardado(),
+        }
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    for nombre, valores in resultados.items():
+        print(f"\n=== {nombre} ===")
+        for clave, valor in valores.items():
+            print(f"  {clave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
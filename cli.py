@@ -0,0 +1,259 @@
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from salida_csv import escribir_csv
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   API Y CLI NO INTERACTIVA (trace / collect-interfaces / import-interfaces / crawl)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+#   python cli.py trace 10.1.1.20 10.1.1.21 --formato csv > rutas.csv
+#   cat ips.txt | python cli.py trace - --motor async
+#   python cli.py collect-interfaces --todos --almacen routers.db
+#   python cli.py import-interfaces routers_interfaces_largo.csv --almacen routers.db
+#   python cli.py crawl --snapshot topologia.db
+#
+# Los mensajes de progreso van a stderr; stdout sólo lleva el resultado (JSON o CSV).
+# Credenciales: --usuario/--password o NETOPS_USUARIO/NETOPS_PASSWORD.
+
+EXIT_OK = 0        # todo encontrado / recolectado
+EXIT_PARCIAL = 1   # parte de los objetivos falló
+EXIT_USO = 2       # argumentos inválidos (argparse también usa 2)
+EXIT_FALLO = 3     # no se obtuvo ningún resultado
+
+
+def credenciales(host=None, usuario=None, password=None):
+    """Diccionario netmiko a partir de ROOT_SWITCH, argumentos y variables de entorno."""
+    import Get_switch
+    sw = dict(Get_switch.ROOT_SWITCH)
+    sw["host"] = host or os.environ.get("NETOPS_RAIZ") or sw["host"]
+    sw["username"] = usuario or os.environ.get("NETOPS_USUARIO") or sw["username"]
+    sw["password"] = password or os.environ.get("NETOPS_PASSWORD") or sw["password"]
+    return sw
+
+
+# ── API ──
+
+def trazar(ips, raiz=None, motor="hilos", workers=None, snapshot=None):
+    """
+    Rastrea cada IP y devuelve {ip: ruta} (ruta = filas como Get_switch.rastrear).
+    motor: "hilos" (rastrear_lote), "arbol" (rastrear_arbol: recorrido compartido),
+           "async" (rastreo_async) o "snapshot" (sin conectar).
+    """
+    import Get_switch
+    raiz = raiz or credenciales()
+    if motor == "snapshot":
+        import topologia
+        snapshot = snapshot or topologia.SNAPSHOT_DB
+        if not os.path.exists(snapshot):
+            raise FileNotFoundError(f"No existe el snapshot {snapshot} (ejecuta antes: cli.py crawl)")
+        snap = topologia.Snapshot(snapshot)
+        try:
+            return {ip: snap.resolver(ip) for ip in ips}
+        finally:
+            snap.cerrar()
+    try:
+        if motor == "async":
+            import asyncio
+            import rastreo_async
+            return asyncio.run(rastreo_async.rastrear_lote_async(
+                raiz, ips, concurrencia=workers or rastreo_async.MAX_RASTREOS_ASYNC))
+        if motor == "arbol":
+            return Get_switch.rastrear_arbol(raiz, ips, max_workers=workers or Get_switch.MAX_RASTREOS_PARALELOS)
+        filas = Get_switch.rastrear_lote(raiz, ips, max_workers=workers or Get_switch.MAX_RASTREOS_PARALELOS)
+        rutas = {ip: [] for ip in ips}
+        for fila in filas:
+            if fila.pop("encontrado"):
+                rutas[fila.pop("ip_buscada")].append(fila)
+        return rutas
+    finally:
+        Get_switch.POOL.cerrar_todo()
+
+
+def recolectar_interfaces(puertos=None, workers=None, ruta_almacen=None):
+    """
+    Recolecta 'show ip interface brief' por consola en los puertos indicados (o en todos).
+    Devuelve [{"puerto", "hostname", "interfaces": [registros]} | {"puerto", "error"}].
+    """
+    import serial.tools.list_ports
+    import int_status
+    from almacen import Almacen, registros_desde_df
+
+    puertos = puertos or [p.device for p in serial.tools.list_ports.comports()]
+    if not puertos:
+        return []
+
+    def uno(port):
+        try:
+            resultado = int_status.recolectar_puerto(port)
+        except Exception as e:
+            return {"puerto": port, "error": str(e)}
+        if not resultado or resultado[1] is None or resultado[1].empty:
+            return {"puerto": port, "error": "no se pudieron extraer interfaces"}
+        hostname, df = resultado
+        return {"puerto": port, "hostname": hostname, "interfaces": registros_desde_df(df)}
+
+    with ThreadPoolExecutor(max_workers=workers or len(puertos)) as pool:
+        resultados = list(pool.map(uno, puertos))
+
+    if ruta_almacen:
+        Almacen(ruta_almacen).guardar_varios(
+            (r["hostname"], r["interfaces"]) for r in resultados if "interfaces" in r
+        )
+    return resultados
+
+
+def descubrir(raiz=None, snapshot=None, workers=None):
+    """Crawl CDP desde la raíz y snapshot en SQLite. Devuelve un resumen."""
+    import topologia
+    from ssh_pool import PoolSSH
+    raiz = raiz or credenciales()
+    snapshot = snapshot or topologia.SNAPSHOT_DB
+    pool = PoolSSH()
+    try:
+        equipos = topologia.crawl(raiz, pool=pool, max_workers=workers or topologia.MAX_EQUIPOS_PARALELOS)
+    finally:
+        pool.cerrar_todo()
+    topologia.guardar_snapshot(equipos, raiz["host"], snapshot)
+    errores = {h: d["error"] for h, d in equipos.items() if "error" in d}
+    return {"snapshot": snapshot, "equipos": len(equipos), "errores": errores}
+
+
+# ── Entrada / salida ──
+
+def leer_objetivos(valores):
+    """Argumentos sueltos; '-' lee de stdin y '@archivo' de un archivo (una entrada por línea)."""
+    objetivos = []
+    for v in valores:
+        if v == "-":
+            lineas = sys.stdin.read().splitlines()
+        elif v.startswith("@"):
+            with open(v[1:], encoding="utf-8-sig") as f:
+                lineas = f.read().splitlines()
+        else:
+            lineas = [v]
+        for linea in lineas:
+            linea = linea.split("#", 1)[0].strip()
+            if linea and linea not in objetivos:
+                objetivos.append(linea)
+    return objetivos
+
+
+def _cmd_trace(args, salida):
+    ips = leer_objetivos(args.ips)
+    if not ips:
+        print("⚠️ No se indicaron IPs.", file=sys.stderr)
+        return EXIT_USO
+    raiz = credenciales(args.raiz, args.usuario, args.password)
+    rutas = trazar(ips, raiz, motor=args.motor, workers=args.workers, snapshot=args.snapshot)
+    if args.formato == "csv":
+        escribir_csv([{"ip_buscada": ip, **salto} for ip in ips for salto in rutas.get(ip, [])], salida)
+    else:
+        json.dump([{"ip": ip, "encontrado": bool(rutas.get(ip)), "ruta": rutas.get(ip, [])} for ip in ips],
+                  salida, ensure_ascii=False, indent=1)
+        salida.write("\n")
+    encontrados = sum(1 for ip in ips if rutas.get(ip))
+    return EXIT_OK if encontrados == len(ips) else EXIT_PARCIAL if encontrados else EXIT_FALLO
+
+
+def _cmd_collect(args, salida):
+    puertos = leer_objetivos(args.puertos) if args.puertos else None
+    if not puertos and not args.todos:
+        print("⚠️ Indica puertos o --todos.", file=sys.stderr)
+        return EXIT_USO
+    resultados = recolectar_interfaces(puertos, workers=args.workers, ruta_almacen=args.almacen)
+    if args.formato == "csv":
+        escribir_csv([
+            {"puerto": r["puerto"], "hostname": r["hostname"], "orden": i, **reg}
+            for r in resultados if "interfaces" in r
+            for i, reg in enumerate(r["interfaces"], 1)
+        ], salida)
+    else:
+        json.dump(resultados, salida, ensure_ascii=False, indent=1)
+        salida.write("\n")
+    ok = sum(1 for r in resultados if "interfaces" in r)
+    return EXIT_OK if resultados and ok == len(resultados) else EXIT_PARCIAL if ok else EXIT_FALLO
+
+
+def _cmd_import(args, salida):
+    import esquema_interfaces
+    from almacen import Almacen
+    equipos, interfaces = esquema_interfaces.importar(Almacen(args.almacen), args.csv)
+    json.dump({"almacen": args.almacen, "equipos": equipos, "interfaces": interfaces},
+              salida, ensure_ascii=False, indent=1)
+    salida.write("\n")
+    return EXIT_OK if equipos else EXIT_FALLO
+
+
+def _cmd_crawl(args, salida):
+    raiz = credenciales(args.raiz, args.usuario, args.password)
+    resumen = descubrir(raiz, snapshot=args.snapshot, workers=args.workers)
+    json.dump(resumen, salida, ensure_ascii=False, indent=1)
+    salida.write("\n")
+    if resumen["equipos"] == len(resumen["errores"]):
+        return EXIT_FALLO
+    return EXIT_PARCIAL if resumen["errores"] else EXIT_OK
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Herramientas de red sin menús interactivos.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def credenciales_args(p):
+        p.add_argument("--raiz", help="switch raíz (por defecto ROOT_SWITCH o NETOPS_RAIZ)")
+        p.add_argument("--usuario")
+        p.add_argument("--password")
+
+    p = sub.add_parser("trace", help="rastrear IPs hasta su puerto de acceso")
+    p.add_argument("ips", nargs="+", help="IPs, '-' para stdin o @archivo")
+    credenciales_args(p)
+    p.add_argument("--motor", choices=["hilos", "arbol", "async", "snapshot"], default="hilos")
+    p.add_argument("--snapshot", help="ruta del snapshot para --motor snapshot")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--formato", choices=["json", "csv"], default="json")
+    p.set_defaults(func=_cmd_trace)
+
+    p = sub.add_parser("collect-interfaces", help="interfaces por consola serie")
+    p.add_argument("puertos", nargs="*", help="puertos serie, '-' para stdin o @archivo")
+    p.add_argument("--todos", action="store_true", help="todos los puertos detectados")
+    p.add_argument("--almacen", help="guardar también en este almacén SQLite")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--formato", choices=["json", "csv"], default="json")
+    p.set_defaults(func=_cmd_collect)
+
+    p = sub.add_parser("import-interfaces", help="cargar un CSV de interfaces (ancho, largo o tipo Data.csv)")
+    p.add_argument("csv", help="CSV de interfaces en cualquier formato del proyecto")
+    p.add_argument("--almacen", required=True, help="almacén SQLite de destino")
+    p.set_defaults(func=_cmd_import)
+
+    p = sub.add_parser("crawl", help="descubrir la topología CDP y guardar el snapshot")
+    credenciales_args(p)
+    p.add_argument("--snapshot", help="ruta del snapshot SQLite")
+    p.add_argument("--workers", type=int)
+    p.set_defaults(func=_cmd_crawl)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    salida = sys.stdout
+    try:
+        # Los print() de los módulos van a stderr para no mezclarse con el resultado
+        with contextlib.redirect_stdout(sys.stderr):
+            return args.func(args, salida)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_FALLO
+    except Exception as e:
+        # Cualquier otro fallo (netmiko, un equipo con salida rara...) también es un código de salida
+        print(f"❌ Error inesperado ({type(e).__name__}): {e}", file=sys.stderr)
+        return EXIT_FALLO
+
+
+if __name__ == "__main__":
+    sys.exit(main())
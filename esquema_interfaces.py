@@ -0,0 +1,122 @@
+import re
+
+import pandas as pd
+
+from almacen import CAMPOS, COLUMNAS_TEMPLATE, FORMATO_BASIC_CONFIG, FORMATO_INT_STATUS
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   ESQUEMA NORMALIZADO: UNA FILA POR INTERFAZ
+# ╚════════════════════════════════════════════════════════════════╝
+
+COLUMNAS = ["hostname", "orden"] + CAMPOS
+
+# Columnas con pocos valores distintos -> categóricas (ocupan 1 byte por fila)
+CATEGORICAS = ["hostname", "ok", "method", "status", "protocol"]
+
+FILAS_POR_BLOQUE = 5000  # filas del CSV ancho procesadas a la vez
+
+
+def tipar(df):
+    """Ordena columnas y aplica los dtypes del esquema largo."""
+    df = df.reindex(columns=COLUMNAS)
+    df["orden"] = pd.to_numeric(df["orden"], errors="coerce").astype("Int32")
+    for col in CAMPOS:
+        df[col] = df[col].fillna("")
+    for col in CATEGORICAS:
+        df[col] = df[col].astype("category")
+    return df.reset_index(drop=True)
+
+
+def _formato_ancho(columnas):
+    """Devuelve (columna clave, [(regex, campo)]) si el CSV es de un formato ancho conocido."""
+    for col_clave, plantillas in (FORMATO_INT_STATUS, FORMATO_BASIC_CONFIG):
+        if col_clave in columnas:
+            patrones = [
+                (re.compile("^" + re.escape(p).replace(r"\{n\}", r"(\d+)") + "$"), campo)
+                for p, campo in plantillas
+            ]
+            return col_clave, patrones
+    return None
+
+
+def ancho_a_largo(df_ancho, col_clave, patrones):
+    """INTERFACE_n / IntN ... -> una fila por (equipo, n) con interfaz no vacía."""
+    grupos = {}  # n -> {campo: columna}
+    for col in df_ancho.columns:
+        for regex, campo in patrones:
+            m = regex.match(col)
+            if m:
+                grupos.setdefault(int(m.group(1)), {})[campo] = col
+                break
+
+    partes = []
+    for n, cols in sorted(grupos.items()):
+        parte = df_ancho[[col_clave] + list(cols.values())].rename(
+            columns={col_clave: "hostname", **{c: campo for campo, c in cols.items()}}
+        )
+        parte = parte[parte["interface"].notna() & (parte["interface"] != "")]
+        parte.insert(1, "orden", n)
+        partes.append(parte)
+    if not partes:
+        return pd.DataFrame(columns=COLUMNAS)
+    largo = pd.concat(partes, ignore_index=True)
+    return largo.sort_values(["hostname", "orden"], kind="stable")
+
+
+def leer_interfaces(ruta_csv):
+    """
+    Lee un CSV de interfaces en cualquiera de los formatos del proyecto y
+    devuelve siempre el esquema largo con dtypes categóricos:
+      - largo (hostname, orden, interface, ...)
+      - ancho de int_status (Hostname, INTERFACE_1, ...) o basic_config (Router_IP, Int1, ...)
+      - tipo Data.csv (INTERFACE/IP_ADDRESS/STATUS/PROTO con la clave sólo en la primera fila)
+    """
+    columnas = pd.read_csv(ruta_csv, nrows=0, encoding="utf-8-sig").columns
+
+    if "hostname" in columnas and "interface" in columnas:
+        return tipar(pd.read_csv(ruta_csv, dtype=str, keep_default_na=False, encoding="utf-8-sig"))
+
+    ancho = _formato_ancho(columnas)
+    if ancho:
+        col_clave, patrones = ancho
+        # Por bloques: nunca se materializa el CSV ancho completo
+        partes = [
+            ancho_a_largo(bloque, col_clave, patrones)
+            for bloque in pd.read_csv(ruta_csv, dtype=str, chunksize=FILAS_POR_BLOQUE, encoding="utf-8-sig")
+        ]
+        return tipar(pd.concat(partes, ignore_index=True))
+
+    if "INTERFACE" in columnas:
+        df = pd.read_csv(ruta_csv, dtype=str, encoding="utf-8-sig")
+        clave = "Device" if "Device" in columnas else columnas[0]
+        df["hostname"] = df[clave].ffill()
+        df = df.rename(columns={c: COLUMNAS_TEMPLATE[c] for c in df.columns if c in COLUMNAS_TEMPLATE})
+        df["orden"] = df.groupby("hostname").cumcount() + 1
+        return tipar(df)
+
+    raise ValueError(f"Formato de CSV de interfaces no reconocido: {ruta_csv}")
+
+
+def importar(almacen, ruta_csv):
+    """
+    Carga en el almacén un CSV de interfaces en cualquier formato de leer_interfaces
+    (también el largo de Almacen.exportar_csv_largo). Devuelve (equipos, interfaces).
+    """
+    df = leer_interfaces(ruta_csv)
+    equipos = [
+        (str(hostname), grupo.sort_values("orden", kind="stable")[CAMPOS].astype(str).to_dict("records"))
+        for hostname, grupo in df.groupby("hostname", sort=False, observed=True)
+    ]
+    almacen.guardar_varios(equipos)
+    return len(equipos), len(df)
+
+
+def leer_almacen(almacen):
+    """Carga el almacén SQLite directamente en el esquema largo."""
+    with almacen._conectar() as con:
+        df = pd.read_sql_query(
+            f"SELECT i.clave AS hostname, i.orden, {', '.join('i.' + c for c in CAMPOS)} "
+            "FROM interfaces i JOIN dispositivos d ON d.clave = i.clave ORDER BY d.rowid, i.orden",
+            con,
+        )
+    return tipar(df)
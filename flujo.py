@@ -0,0 +1,81 @@
+import re
+import time
+
+from transporte_serial import RE_MORE, RE_PROMPT, TIMEOUT_COMANDO
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   SALIDAS GRANDES EN FLUJO: FRAGMENTOS -> LÍNEAS -> REGISTROS
+# ╚════════════════════════════════════════════════════════════════╝
+#
+# Cada etapa es un generador: los registros salen mientras el equipo sigue
+# enviando y en memoria sólo queda la línea a medias, no la salida entera.
+#
+#   fragmentos = leer_netmiko(conn, "show mac address-table")   # o enviar_comando(ser, ...)
+#   tabla = TablaMAC.desde_filas(filas_mac_table(lineas(fragmentos)))
+#
+# Los envoltorios de sesión (telemetria.ConexionInstrumentada, grabacion.GrabadorNetmiko)
+# definen leer_en_flujo(comando, timeout) para medir o grabar también estas lecturas.
+
+PAUSA_LECTURA = 0.02   # segundos entre lecturas del canal SSH sin datos
+COLA_PROMPT = 256      # caracteres del final que se miran para detectar el prompt
+
+
+def lineas(fragmentos):
+    """Fragmentos de texto (cortados en cualquier punto) -> líneas sin el salto final."""
+    pendiente = ""
+    for fragmento in fragmentos:
+        partes = (pendiente + fragmento).split("\n")
+        pendiente = partes.pop()
+        for linea in partes:
+            yield linea.rstrip("\r")
+    if pendiente:
+        yield pendiente.rstrip("\r")
+
+
+def sin_eco(lineas_salida, comando):
+    """Quita el eco del comando (la línea que empieza por él, como send_command de basic_config)."""
+    comando = comando.lower()
+    for linea in lineas_salida:
+        if not linea.strip().lower().startswith(comando):
+            yield linea
+
+
+def leer_netmiko(conn, comando, timeout=TIMEOUT_COMANDO):
+    """
+    Generador: envía `comando` por la sesión netmiko y entrega los fragmentos
+    tal como llegan del canal hasta ver el prompt (send_command los acumularía
+    todos). Sesiones sin canal (p. ej. grabaciones simuladas) devuelven la
+    salida de send_command en un solo fragmento.
+    Si no llega el prompt en `timeout` lanza TimeoutError: la salida está
+    incompleta y la sesión tiene datos sin leer, así que no debe reutilizarse.
+    """
+    # Se mira la clase y no la instancia: los envoltorios reenvían cualquier atributo
+    if hasattr(type(conn), "leer_en_flujo"):
+        yield from conn.leer_en_flujo(comando, timeout)
+    elif hasattr(type(conn), "read_channel"):
+        yield from _leer_canal(conn, comando, timeout)
+    else:
+        yield conn.send_command(comando)
+
+
+def _leer_canal(conn, comando, timeout):
+    base = getattr(conn, "base_prompt", None)
+    prompt = re.compile(rf"{re.escape(base)}(?:\([\w.\-/ ]+\))?[>#]\s*$") if base else RE_PROMPT
+    if hasattr(conn, "clear_buffer"):
+        conn.clear_buffer()
+    conn.write_channel(comando + "\n")
+    limite = time.monotonic() + timeout
+    cola = ""
+    while time.monotonic() < limite:
+        datos = conn.read_channel()
+        if not datos:
+            time.sleep(PAUSA_LECTURA)
+            continue
+        if "--More--" in datos:
+            conn.write_channel(" ")
+            datos = RE_MORE.sub("", datos)
+        cola = (cola + datos)[-COLA_PROMPT:]
+        yield datos
+        if prompt.search(cola):
+            return
+    raise TimeoutError(f"Sin prompt de {conn.host} tras {timeout} s con '{comando}'")
@@ -0,0 +1,250 @@
+import json
+import os
+import threading
+import time
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   GRABACIÓN Y REPRODUCCIÓN DE SESIONES (SERIAL Y NETMIKO)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+# Formato de una grabación (JSON):
+#   {"tipo": "serial" | "ssh", "host": "...", "prompt": "Router#",
+#    "interacciones": [{"comando": "...", "salida": "...", "duracion": 0.12}, ...]}
+
+DIR_GRABACIONES = "grabaciones"
+
+
+def guardar_grabacion(datos, ruta):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=1)
+
+
+def cargar_grabacion(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ruta_grabacion(tipo, host, directorio=DIR_GRABACIONES):
+    return os.path.join(directorio, f"{tipo}_{host.replace('/', '_').replace(':', '_')}.json")
+
+
+class _Respuestas:
+    """Índice comando -> salidas grabadas; se devuelven en orden y la última se repite."""
+
+    def __init__(self, interacciones):
+        self._por_comando = {}
+        for i in interacciones:
+            self._por_comando.setdefault(i["comando"].strip(), []).append(i)
+        self._usos = {}
+
+    def buscar(self, comando):
+        opciones = self._por_comando.get(comando.strip())
+        if not opciones:
+            return None
+        n = self._usos.get(comando, 0)
+        self._usos[comando] = n + 1
+        return opciones[min(n, len(opciones) - 1)]
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   NETMIKO
+# ╚════════════════════════════════════════════════════════════════╝
+
+class GrabadorNetmiko:
+    """Envuelve una sesión netmiko y anota cada send_command/find_prompt."""
+
+    def __init__(self, conn, ruta=None):
+        self._conn = conn
+        self.ruta = ruta or ruta_grabacion("ssh", conn.host)
+        self.datos = {"tipo": "ssh", "host": conn.host, "prompt": "", "interacciones": []}
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def find_prompt(self, *args, **kwargs):
+        prompt = self._conn.find_prompt(*args, **kwargs)
+        self.datos["prompt"] = prompt
+        return prompt
+
+    def send_command(self, comando, *args, **kwargs):
+        inicio = time.perf_counter()
+        salida = self._conn.send_command(comando, *args, **kwargs)
+        self.datos["interacciones"].append({
+            "comando": comando, "salida": salida, "duracion": round(time.perf_counter() - inicio, 4),
+        })
+        return salida
+
+    def leer_en_flujo(self, comando, timeout):
+        """Lectura en flujo (flujo.leer_netmiko): se graba como un send_command con la salida completa."""
+        from flujo import leer_netmiko
+        inicio = time.perf_counter()
+        fragmentos = []
+        for fragmento in leer_netmiko(self._conn, comando, timeout):
+            fragmentos.append(fragmento)
+            yield fragmento
+        self.datos["interacciones"].append({
+            "comando": comando, "salida": "".join(fragmentos), "duracion": round(time.perf_counter() - inicio, 4),
+        })
+
+    def disconnect(self):
+        guardar_grabacion(self.datos, self.ruta)
+        self._conn.disconnect()
+
+
+class NetmikoSimulado:
+    """Sesión netmiko falsa que responde desde una grabación con su latencia (× escala)."""
+
+    def __init__(self, grabacion, escala=1.0):
+        self.host = grabacion["host"]
+        self.prompt = grabacion.get("prompt") or "Switch#"
+        self.escala = escala
+        self._respuestas = _Respuestas(grabacion["interacciones"])
+
+    def find_prompt(self, *args, **kwargs):
+        return self.prompt
+
+    def send_command(self, comando, *args, **kwargs):
+        r = self._respuestas.buscar(comando)
+        if r is None:
+            return "% Invalid input detected at '^' marker.\n"
+        if self.escala:
+            time.sleep(r.get("duracion", 0) * self.escala)
+        return r["salida"]
+
+    def disconnect(self):
+        pass
+
+
+def conectar_simulado(directorio=DIR_GRABACIONES, escala=1.0, latencia_conexion=0.0):
+    """
+    Devuelve una función conectar(sw) para PoolSSH que abre NetmikoSimulado
+    desde <directorio>/ssh_<host>.json. Sin grabación -> OSError, como un host caído.
+    """
+    cache = {}
+    lock = threading.Lock()
+
+    def conectar(sw):
+        ruta = ruta_grabacion("ssh", sw["host"], directorio)
+        with lock:
+            if ruta not in cache:
+                if not os.path.exists(ruta):
+                    raise OSError(f"Sin grabación para {sw['host']}")
+                cache[ruta] = cargar_grabacion(ruta)
+        if latencia_conexion:
+            time.sleep(latencia_conexion * escala)
+        return NetmikoSimulado(cache[ruta], escala=escala)
+
+    return conectar
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   SERIAL
+# ╚════════════════════════════════════════════════════════════════╝
+
+class GrabadorSerial:
+    """Envuelve un serial.Serial: cada write de una línea abre una interacción y los read se le suman."""
+
+    def __init__(self, ser, ruta=None, host=None):
+        self._ser = ser
+        host = host or getattr(ser, "port", "serial")
+        self.ruta = ruta or ruta_grabacion("serial", host)
+        self.datos = {"tipo": "serial", "host": host, "prompt": "", "interacciones": []}
+        self._actual = None
+        self._inicio = 0.0
+
+    def __getattr__(self, nombre):
+        return getattr(self._ser, nombre)
+
+    @property
+    def in_waiting(self):
+        return self._ser.in_waiting
+
+    def write(self, datos):
+        texto = datos.decode(errors="ignore")
+        # Un espacio suelto es la respuesta a --More--: sigue la misma interacción
+        if texto.endswith("\r\n") or self._actual is None:
+            self._actual = {"comando": texto.rstrip("\r\n"), "salida": "", "duracion": 0.0}
+            self.datos["interacciones"].append(self._actual)
+            self._inicio = time.perf_counter()
+        return self._ser.write(datos)
+
+    def read(self, n=1):
+        datos = self._ser.read(n)
+        if datos and self._actual is not None:
+            self._actual["salida"] += datos.decode(errors="ignore")
+            self._actual["duracion"] = round(time.perf_counter() - self._inicio, 4)
+        return datos
+
+    def close(self):
+        guardar_grabacion(self.datos, self.ruta)
+        self._ser.close()
+
+
+class SerialSimulado:
+    """
+    Puerto serie falso: al recibir un comando pone en cola la salida grabada,
+    que va apareciendo en in_waiting repartida a lo largo de su duración (× escala).
+    """
+
+    def __init__(self, grabacion, escala=1.0, timeout=1):
+        self.port = grabacion["host"]
+        self.escala = escala
+        self.timeout = timeout
+        self._respuestas = _Respuestas(grabacion["interacciones"])
+        self._pendiente = b""
+        self._inicio = 0.0
+        self._duracion = 0.0
+        self._entregado = 0
+
+    def _disponibles(self):
+        """Bytes que ya 'llegaron' según el tiempo transcurrido."""
+        if not self._pendiente:
+            return 0
+        if not self._duracion:
+            return len(self._pendiente) - self._entregado
+        avance = min((time.perf_counter() - self._inicio) / self._duracion, 1.0)
+        return int(len(self._pendiente) * avance) - self._entregado
+
+    @property
+    def in_waiting(self):
+        return max(self._disponibles(), 0)
+
+    def reset_input_buffer(self):
+        self._pendiente, self._entregado = b"", 0
+
+    def write(self, datos):
+        texto = datos.decode(errors="ignore")
+        if texto.strip() == "" and texto != "\r\n":
+            return len(datos)  # espacio de --More--: la grabación ya trae la salida completa
+        r = self._respuestas.buscar(texto.rstrip("\r\n"))
+        salida = r["salida"] if r else texto.rstrip("\r\n") + "\r\n% Invalid input detected\r\nRouter#"
+        self._pendiente = salida.encode()
+        self._entregado = 0
+        self._duracion = (r.get("duracion", 0) if r else 0) * self.escala
+        self._inicio = time.perf_counter()
+        return len(datos)
+
+    def read(self, n=1):
+        limite = time.perf_counter() + (self.timeout or 0)
+        while self._disponibles() <= 0:
+            if self._entregado >= len(self._pendiente) or time.perf_counter() >= limite:
+                return b""
+            time.sleep(0.001)
+        n = min(n, self._disponibles())
+        datos = self._pendiente[self._entregado:self._entregado + n]
+        self._entregado += n
+        return datos
+
+    def close(self):
+        pass
+
+
+def conectar_grabando(directorio=DIR_GRABACIONES):
+    """Función conectar(sw) para PoolSSH que graba cada sesión real al desconectarse."""
+    from netmiko import ConnectHandler
+
+    def conectar(sw):
+        return GrabadorNetmiko(ConnectHandler(**sw), ruta_grabacion("ssh", sw["host"], directorio))
+
+    return conectar
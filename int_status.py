@@ -1,18 +1,35 @@
-import serial
-import serial.tools.list_ports
 import os
+import sys
 import time
-import pandas as pd
-import textfsm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from parser_rapido import parsear_en_flujo, parsear_ip_int_brief
+from archivo_crudo import archivar
+from almacen import Almacen, FORMATO_INT_STATUS, registros_desde_df
+from grabacion import GrabadorSerial
+from telemetria import medir_comando
+from flujo import lineas, sin_eco
+from transporte_serial import TIMEOUT_COMANDO, enviar_comando
 
 CSV_FILE = "routers_interfaces.csv"
+CSV_LARGO = "routers_interfaces_largo.csv"  # una fila por interfaz
+DB_FILE = "routers_interfaces.db"
 TEMPLATE_FILE = "Value.txt"
 
+# Almacén indexado por hostname; se abre al primer uso (la primera vez importa el CSV existente)
+_ALMACEN = None
+
+def almacen():
+    global _ALMACEN
+    if _ALMACEN is None:
+        _ALMACEN = Almacen(DB_FILE, FORMATO_INT_STATUS, csv_legado=CSV_FILE)
+    return _ALMACEN
+
 # ╔════════════════════════════════════════════════════════════════╗
 #   FUNCIONES AUXILIARES
 # ╚════════════════════════════════════════════════════════════════╝
 
 def detectar_puerto_serial():
+    import serial.tools.list_ports
     puertos = serial.tools.list_ports.comports()
     if not puertos:
         print("⚠ No hay puertos disponibles.")
@@ -39,7 +56,10 @@ def detectar_puerto_serial():
 
 def conectar_serial(port):
     try:
+        import serial
         ser = serial.Serial(port, baudrate=9600, timeout=1)
+        if os.environ.get("GRABAR_SESIONES"):
+            ser = GrabadorSerial(ser)
         time.sleep(2)
         print(f"✅ Conectado a {port}")
         return ser
@@ -47,13 +67,16 @@ def conectar_serial(port):
         print(f"❌ Error al conectar: {e}")
         return None
 
-def send_command(ser, cmd, delay=2):
-    ser.reset_input_buffer()
-    ser.write((cmd + "\r\n").encode())
-    time.sleep(delay)
-    output = ser.read(ser.in_waiting).decode(errors="ignore")
+@medir_comando
+def send_command(ser, cmd, timeout=TIMEOUT_COMANDO):
+    output = "".join(enviar_comando(ser, cmd, timeout=timeout))
     return output.strip()
 
+@medir_comando
+def leer_ip_int_brief(ser, cmd, timeout=TIMEOUT_COMANDO):
+    """Ejecuta show ip interface brief y parsea cada línea mientras llega. Devuelve (salida, columnas o None)."""
+    return parsear_en_flujo(sin_eco(lineas(enviar_comando(ser, cmd, timeout=timeout)), cmd), TEMPLATE_FILE)
+
 # ╔════════════════════════════════════════════════════════════════╗
 #   FUNCIONES PRINCIPALES
 # ╚════════════════════════════════════════════════════════════════╝
@@ -69,59 +92,90 @@ def get_hostname(ser):
             return output.split("hostname")[-1].strip()
     return "Desconocido"
 
-def obtener_interfaces_textfsm(ser):
+def obtener_interfaces_textfsm(ser, hostname=None):
     if not os.path.exists(TEMPLATE_FILE):
         print(f"⚠ No se encontró el template: {TEMPLATE_FILE}")
         print("Crea este archivo con el contenido correcto para 'show ip interface brief'.")
         return None
 
     print("📡 Ejecutando 'show ip interface brief'...")
-    output = send_command(ser, "show ip interface brief", delay=3)
-    with open(TEMPLATE_FILE) as template:
-        fsm = textfsm.TextFSM(template)
-        try:
-            result = fsm.ParseText(output)
-            headers = fsm.header
-            df = pd.DataFrame(result, columns=headers)
-            return df
-        except Exception as e:
-            print(f"⚠ Error al parsear: {e}")
-            print("Salida cruda del dispositivo:")
-            print(output)
-            return None
+    output, columnas = leer_ip_int_brief(ser, "show ip interface brief")
+    # La salida cruda queda archivada (archivo_crudo) para poder re-parsearla sin el equipo
+    archivar(hostname or str(getattr(ser, "port", "")), "show ip interface brief", output)
+    try:
+        import pandas as pd
+        headers, columnas = parsear_ip_int_brief(output, TEMPLATE_FILE, columnas)
+        df = pd.DataFrame(columnas, columns=headers)
+        return df
+    except Exception as e:
+        print(f"⚠ Error al parsear: {e}")
+        print("Salida cruda del dispositivo:")
+        print(output)
+        return None
 
-def guardar_interfaces_en_csv(hostname, df):
+def guardar_interfaces(hostname, df):
+    """Guarda (upsert por hostname) las interfaces en el almacén; el CSV se exporta aparte."""
     if df is None or df.empty:
         print("⚠ No hay datos para guardar.")
         return
+    almacen().guardar(hostname, registros_desde_df(df))
+    print(f"✅ Datos guardados/actualizados para {hostname} en {DB_FILE}")
 
-    # Aplanar la info en una sola fila
-    data = {"Hostname": hostname}
-    for i, row in df.iterrows():
-        for col in df.columns:
-            data[f"{col}_{i+1}"] = row[col]
-
-    # --- 🔧 CORRECCIÓN AQUÍ ---
-    if os.path.exists(CSV_FILE):
-        df_csv = pd.read_csv(CSV_FILE)
-
-        # Si ya existe el hostname, actualiza esa fila
-        if hostname in df_csv["Hostname"].values:
-            idx = df_csv.index[df_csv["Hostname"] == hostname][0]
-            for k, v in data.items():
-                df_csv.loc[idx, k] = v
-        else:
-            # Agrega un nuevo router
-            df_csv = pd.concat([df_csv, pd.DataFrame([data])], ignore_index=True)
-    else:
-        # Si no existe el archivo, créalo con el router actual
-        df_csv = pd.DataFrame([data])
+def exportar_csv():
+    try:
+        almacen().exportar_csv(CSV_FILE)
+        almacen().exportar_csv_largo(CSV_LARGO)
+    except ValueError as e:
+        print(f"⚠ {e}")
 
-    # Rellenar NaN con vacío para evitar errores de escritura
-    df_csv = df_csv.fillna("")
+# ╔════════════════════════════════════════════════════════════════╗
+#   MODO MULTIPUERTO (NO INTERACTIVO)
+# ╚════════════════════════════════════════════════════════════════╝
 
-    df_csv.to_csv(CSV_FILE, index=False)
-    print(f"✅ Datos guardados/actualizados en {CSV_FILE}")
+def recolectar_puerto(port):
+    """Abre un puerto, obtiene hostname e interfaces y lo cierra. Devuelve (hostname, df) o None."""
+    ser = conectar_serial(port)
+    if not ser:
+        return None
+    try:
+        hostname = get_hostname(ser)
+        print(f"🔹 {port}: hostname {hostname}")
+        df = obtener_interfaces_textfsm(ser, hostname)
+        return hostname, df
+    finally:
+        ser.close()
+
+def recolectar_todos_los_puertos(max_workers=None):
+    """Recolecta interfaces en todos los puertos serie a la vez (un hilo por puerto) y guarda una vez."""
+    import serial.tools.list_ports
+    puertos = [p.device for p in serial.tools.list_ports.comports()]
+    if not puertos:
+        print("⚠ No hay puertos disponibles.")
+        return []
+
+    print(f"🔌 Recolectando en {len(puertos)} puertos: {', '.join(puertos)}")
+    equipos = []
+    with ThreadPoolExecutor(max_workers=max_workers or len(puertos)) as pool:
+        futuros = {pool.submit(recolectar_puerto, port): port for port in puertos}
+        for futuro in as_completed(futuros):
+            port = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:
+                print(f"❌ {port}: {e}")
+                continue
+            if not resultado or resultado[1] is None or resultado[1].empty:
+                print(f"⚠ {port}: no se pudieron extraer interfaces.")
+                continue
+            hostname, df = resultado
+            equipos.append((hostname, registros_desde_df(df)))
+
+    if equipos:
+        almacen().guardar_varios(equipos)
+        exportar_csv()
+    else:
+        print("⚠ No hay datos para guardar.")
+    return equipos
 
 # ╔════════════════════════════════════════════════════════════════╗
 #   MENÚ
@@ -142,6 +196,7 @@ def menu():
 ╚════════════════════════════════════════╝
 1. Comandos manuales
 2. Obtener interfaces
+3. Exportar CSV
 0. Salir
 """)
         opcion = input("Selecciona una opción: ").strip()
@@ -151,20 +206,30 @@ def menu():
                 cmd = input("Router# ").strip()
                 if cmd.lower() in ["exit", "salir"]:
                     break
-                output = send_command(ser, cmd, delay=2)
-                print(output)
+                try:
+                    print(send_command(ser, cmd))
+                except TimeoutError as e:
+                    print(f"⚠ {e}")
 
         elif opcion == "2":
-            hostname = get_hostname(ser)
-            print(f"🔹 Hostname detectado: {hostname}")
-            df = obtener_interfaces_textfsm(ser)
+            try:
+                hostname = get_hostname(ser)
+                print(f"🔹 Hostname detectado: {hostname}")
+                df = obtener_interfaces_textfsm(ser, hostname)
+            except TimeoutError as e:
+                print(f"⚠ {e}")
+                df = None
             if df is not None:
-                guardar_interfaces_en_csv(hostname, df)
+                guardar_interfaces(hostname, df)
             else:
                 print("⚠ No se pudieron extraer interfaces.")
             input("Presiona ENTER para volver al menú...")
 
+        elif opcion == "3":
+            exportar_csv()
+
         elif opcion == "0":
+            exportar_csv()
             ser.close()
             print("👋 Conexión cerrada.")
             break
@@ -176,4 +241,8 @@ def menu():
 #   MAIN
 # ╚════════════════════════════════════════════════════════════════╝
 if __name__ == "__main__":
-    menu()
+    # python int_status.py --todos  -> recolecta en todos los puertos sin preguntar
+    if "--todos" in sys.argv:
+        recolectar_todos_los_puertos()
+    else:
+        menu()
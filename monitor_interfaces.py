@@ -0,0 +1,217 @@
+import argparse
+import csv
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import int_status
+from almacen import Almacen, FORMATO_INT_STATUS, registros_desde_columnas
+from parser_rapido import parsear_ip_int_brief
+from ssh_pool import PoolSSH
+from telemetria import TELEMETRIA, conectar_instrumentado
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   MONITOR DE INTERFACES DE LA FLOTA (SÓLO GUARDA LOS CAMBIOS)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+#   python monitor_interfaces.py                          -> Data-JesusFlores.csv cada 30 s
+#   python monitor_interfaces.py --inventario flota.csv --intervalo 20
+#   python monitor_interfaces.py --ciclos 1               -> un solo ciclo (cron)
+#
+# Inventario CSV: Serie, Port, Device, User, Password (+ Host opcional).
+# Port = puerto serie (COM16, /dev/ttyUSB0) -> consola; si hay Host (o Port es una IP) -> SSH.
+# El último estado de cada equipo vive en memoria; cada ciclo sólo escribe en
+# el almacén las interfaces que cambiaron (tabla eventos + su fila en interfaces).
+
+INVENTARIO = "Data-JesusFlores.csv"
+INTERVALO_SONDEO = 30        # segundos entre ciclos: un cambio se ve en < 1 min
+MAX_SONDEOS_PARALELOS = 16
+
+RE_IPV4 = re.compile(r"^\d+\.\d+\.\d+\.\d+$")
+
+
+def leer_inventario(ruta=INVENTARIO):
+    """Lista de equipos {serie, puerto, equipo, usuario, password, host}."""
+    equipos = []
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        for fila in csv.DictReader(f):
+            fila = {k.strip().lower(): (v or "").strip() for k, v in fila.items() if k}
+            puerto = fila.get("port", "")
+            host = fila.get("host") or fila.get("ip") or (puerto if RE_IPV4.match(puerto) else "")
+            if not (puerto or host):
+                continue
+            equipos.append({
+                "serie": fila.get("serie", ""),
+                "puerto": "" if host == puerto else puerto,
+                "equipo": fila.get("device", ""),
+                "usuario": fila.get("user", ""),
+                "password": fila.get("password", ""),
+                "host": host,
+            })
+    return equipos
+
+
+def estado_de(registros):
+    """{interfaz: (status, protocol)} en el orden del equipo."""
+    return {r["interface"]: (r.get("status", ""), r.get("protocol", "")) for r in registros}
+
+
+def diferencias(clave, anterior, actual):
+    """Eventos de cambio entre dos estados (altas y bajas de interfaz incluidas)."""
+    eventos = []
+    for intf in list(anterior) + [i for i in actual if i not in anterior]:
+        antes, ahora = anterior.get(intf, ("", "")), actual.get(intf, ("", ""))
+        if antes != ahora:
+            eventos.append({
+                "clave": clave, "interface": intf,
+                "status_anterior": antes[0], "protocol_anterior": antes[1],
+                "status": ahora[0], "protocol": ahora[1],
+            })
+    return eventos
+
+
+class MonitorInterfaces:
+    """
+    Sondea 'show ip interface brief' en cada equipo del inventario y compara con
+    el último estado conocido. Las sesiones (puerto serie o SSH) se mantienen
+    abiertas entre ciclos; si una falla se reabre en el siguiente.
+    """
+
+    def __init__(self, equipos, almacen, intervalo=INTERVALO_SONDEO, max_workers=MAX_SONDEOS_PARALELOS, pool=None):
+        self.equipos = equipos
+        self.almacen = almacen
+        self.intervalo = intervalo
+        self.max_workers = max_workers
+        self.pool = pool or PoolSSH(conectar=conectar_instrumentado())
+        self._estados = {}     # clave -> {interfaz: (status, protocol)}
+        self._seriales = {}    # puerto -> serial.Serial abierto
+        self._lock = threading.Lock()
+
+    # ── Transporte ──
+
+    def _sondear_consola(self, equipo):
+        puerto = equipo["puerto"]
+        ser = self._seriales.get(puerto)
+        if ser is None:
+            ser = int_status.conectar_serial(puerto)
+            if ser is None:
+                raise ConnectionError(f"no se pudo abrir {puerto}")
+            self._seriales[puerto] = ser
+        try:
+            salida, columnas = int_status.leer_ip_int_brief(ser, "show ip interface brief")
+        except Exception:
+            self._seriales.pop(puerto, None)
+            ser.close()
+            raise
+        clave = equipo["equipo"] or int_status.get_hostname(ser)
+        _, columnas = parsear_ip_int_brief(salida, int_status.TEMPLATE_FILE, columnas)
+        return clave, registros_desde_columnas(columnas)
+
+    def _sondear_ssh(self, equipo):
+        sw = {
+            "device_type": "cisco_ios",
+            "host": equipo["host"],
+            "username": equipo["usuario"],
+            "password": equipo["password"],
+        }
+        with self.pool.sesion(sw) as conn:
+            salida = conn.send_command("show ip interface brief")
+            clave = equipo["equipo"] or conn.find_prompt().replace("#", "").strip()
+        _, columnas = parsear_ip_int_brief(salida)
+        return clave, registros_desde_columnas(columnas)
+
+    def sondear(self, equipo):
+        """Devuelve (clave, registros) del equipo."""
+        destino = equipo["host"] or equipo["puerto"]
+        with TELEMETRIA.span("monitor", host=destino):
+            if equipo["host"]:
+                return self._sondear_ssh(equipo)
+            return self._sondear_consola(equipo)
+
+    # ── Diferencias ──
+
+    def _anterior(self, clave):
+        """Estado en memoria; al arrancar, el último guardado en el almacén (None si no hay)."""
+        with self._lock:
+            if clave not in self._estados:
+                guardado = self.almacen.interfaces(clave)
+                self._estados[clave] = estado_de(guardado) if guardado else None
+            return self._estados[clave]
+
+    def ciclo(self):
+        """Un ciclo sobre toda la flota. Devuelve los eventos registrados."""
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.equipos)) or 1) as ejecutor:
+            futuros = [(e, ejecutor.submit(self.sondear, e)) for e in self.equipos]
+            eventos, completos = [], []
+            for equipo, futuro in futuros:
+                try:
+                    clave, registros = futuro.result()
+                except Exception as e:
+                    print(f"⚠️ {equipo['host'] or equipo['puerto']}: {e}")
+                    continue
+                if not registros:
+                    print(f"⚠️ {clave}: no se pudieron extraer interfaces.")
+                    continue
+                anterior, actual = self._anterior(clave), estado_de(registros)
+                if anterior is None or list(anterior) != list(actual):
+                    # Equipo nuevo o juego de interfaces distinto: se reescribe entero
+                    completos.append((clave, registros))
+                if anterior is not None:
+                    eventos.extend(diferencias(clave, anterior, actual))
+                with self._lock:
+                    self._estados[clave] = actual
+        if eventos or completos:
+            self.almacen.registrar_eventos(eventos, completos)
+        for e in eventos:
+            print(f"🔔 {e['clave']} {e['interface']}: "
+                  f"{e['status_anterior'] or '-'}/{e['protocol_anterior'] or '-'} → {e['status'] or '-'}/{e['protocol'] or '-'}")
+        return eventos
+
+    def ejecutar(self, ciclos=None):
+        """Ciclos cada `intervalo` segundos (medidos desde el inicio de cada uno) hasta Ctrl+C."""
+        n = 0
+        try:
+            while ciclos is None or n < ciclos:
+                inicio = time.monotonic()
+                eventos = self.ciclo()
+                n += 1
+                duracion = time.monotonic() - inicio
+                print(f"⏱️ Ciclo {n}: {len(self.equipos)} equipos, {len(eventos)} cambios en {duracion:.1f} s")
+                if ciclos is None or n < ciclos:
+                    time.sleep(max(self.intervalo - duracion, 0))
+        except KeyboardInterrupt:
+            print("\n🛑 Monitor detenido.")
+        finally:
+            self.cerrar()
+
+    def cerrar(self):
+        for ser in self._seriales.values():
+            try:
+                ser.close()
+            except Exception:
+                pass
+        self._seriales.clear()
+        self.pool.cerrar_todo()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor de estado de interfaces de la flota.")
+    parser.add_argument("--inventario", default=INVENTARIO, help="CSV con Serie, Port, Device, User, Password")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_SONDEO, help="segundos entre ciclos")
+    parser.add_argument("--db", default=int_status.DB_FILE, help="almacén SQLite (tablas interfaces y eventos)")
+    parser.add_argument("--ciclos", type=int, help="número de ciclos (por defecto, sin fin)")
+    parser.add_argument("--workers", type=int, default=MAX_SONDEOS_PARALELOS)
+    args = parser.parse_args()
+
+    equipos = leer_inventario(args.inventario)
+    if not equipos:
+        print(f"⚠️ {args.inventario} no tiene equipos.")
+        return
+    print(f"📋 {len(equipos)} equipos en {args.inventario}; sondeo cada {args.intervalo:g} s")
+    monitor = MonitorInterfaces(equipos, Almacen(args.db, FORMATO_INT_STATUS), args.intervalo, args.workers)
+    monitor.ejecutar(args.ciclos)
+
+
+if __name__ == "__main__":
+    main()
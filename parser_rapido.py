@@ -0,0 +1,142 @@
+import re
+import sys
+
+from plantillas import REGISTRO, parsear
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   PARSER RÁPIDO DE "SHOW IP INTERFACE BRIEF" (CON RESPALDO TEXTFSM)
+# ╚════════════════════════════════════════════════════════════════╝
+
+# Una línea de datos: mismos valores que aceptan Value.txt y la plantilla de ntc
+RE_LINEA = re.compile(
+    r"^(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(administratively down|up|down)\s+(up|down)\s*$"
+)
+# Cabecera de la tabla: ninguna plantilla la convierte en registro
+RE_CABECERA = re.compile(r"^\s*Interface\s+IP-Address\s+OK\?\s+Method\s+Status\s+Protocol\s*$")
+# Un registro necesita al menos 6 campos; líneas más cortas (vacías, prompt,
+# eco del comando) tampoco producen registro en las plantillas
+MIN_CAMPOS = 6
+
+# Posición en RE_LINEA de cada columna que usan las plantillas
+GRUPOS = {
+    "INTERFACE": 0,
+    "IP_ADDRESS": 1,
+    "IP-ADDRESS": 1,
+    "OK": 2,
+    "METHOD": 3,
+    "STATUS": 4,
+    "PROTOCOL": 5,
+    "PROTO": 5,
+}
+
+
+class LineaDesconocida(Exception):
+    """El parser rápido encontró una línea que no sabe interpretar."""
+
+
+def parsear_rapido(salida, cabecera):
+    """
+    Una sola pasada con la regex precompilada. Devuelve {columna: [valores]}.
+    Lanza LineaDesconocida si alguna línea no es dato, cabecera ni demasiado corta.
+    """
+    return _columnas(salida.splitlines(), cabecera)
+
+
+def _columnas(lineas_salida, cabecera):
+    indices = [GRUPOS[c] for c in cabecera]
+    columnas = [[] for _ in cabecera]
+    match = RE_LINEA.match
+    cabecera_tabla = RE_CABECERA.match
+    for linea in lineas_salida:
+        m = match(linea)
+        if m:
+            valores = m.groups()
+            for col, i in zip(columnas, indices):
+                col.append(valores[i])
+        elif len(linea.split()) >= MIN_CAMPOS and not cabecera_tabla(linea):
+            raise LineaDesconocida(linea)
+    return dict(zip(cabecera, columnas))
+
+
+def parsear_ip_int_brief(salida, plantilla="show ip interface brief", columnas=None):
+    """
+    Devuelve (cabecera, {columna: [valores]}) con la cabecera de `plantilla`.
+    Usa el parser rápido y, ante cualquier línea rara o columna desconocida,
+    recurre a TextFSM para el texto completo.
+    `columnas` son las ya obtenidas por parsear_en_flujo (no se vuelve a parsear).
+    """
+    # TextFSM sólo se carga si hay que recurrir a él
+    cabecera = REGISTRO.cabecera(plantilla)
+    if columnas is not None:
+        return cabecera, columnas
+    if all(c in GRUPOS for c in cabecera):
+        try:
+            return cabecera, parsear_rapido(salida, cabecera)
+        except LineaDesconocida:
+            pass
+    cabecera, filas = parsear(plantilla, salida)
+    return cabecera, {c: [f[i] for f in filas] for i, c in enumerate(cabecera)}
+
+
+def parsear_en_flujo(lineas_salida, plantilla="show ip interface brief"):
+    """
+    Parser rápido sobre líneas que van llegando (flujo.lineas(enviar_comando(...))):
+    cada línea se interpreta mientras el equipo sigue enviando la siguiente.
+    Devuelve (salida, columnas); columnas es None si alguna línea obliga a pasar
+    la salida por TextFSM, que se hace con parsear_ip_int_brief(salida, plantilla).
+    """
+    lineas_salida = iter(lineas_salida)
+    vistas = []  # la salida completa hace falta para archivarla y para el respaldo
+
+    def guardar():
+        for linea in lineas_salida:
+            vistas.append(linea)
+            yield linea
+
+    cabecera = REGISTRO.cabecera(plantilla)
+    columnas = None
+    if all(c in GRUPOS for c in cabecera):
+        try:
+            columnas = _columnas(guardar(), cabecera)
+        except LineaDesconocida:
+            pass
+    # Tras una línea rara se sigue leyendo hasta el prompt
+    vistas.extend(lineas_salida)
+    return "\n".join(vistas).strip(), columnas
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   VERIFICACIÓN CONTRA LA PLANTILLA TEXTFSM
+# ╚════════════════════════════════════════════════════════════════╝
+
+def verificar_equivalencia(salida, plantilla="show ip interface brief"):
+    """
+    Compara el parser rápido con TextFSM sobre una captura.
+    Devuelve None si coinciden (o si la captura cae al respaldo) y un texto con la diferencia si no.
+    """
+    cabecera, filas = parsear(plantilla, salida)
+    try:
+        rapido = parsear_rapido(salida, cabecera)
+    except LineaDesconocida:
+        return None
+    esperado = {c: [f[i] for f in filas] for i, c in enumerate(cabecera)}
+    if rapido != esperado:
+        return f"TextFSM: {esperado}\nRápido:  {rapido}"
+    return None
+
+
+if __name__ == "__main__":
+    # python parser_rapido.py [--plantilla Value.txt] captura1.txt captura2.txt ...
+    args = sys.argv[1:]
+    plantilla = "show ip interface brief"
+    if args[:1] == ["--plantilla"]:
+        plantilla, args = args[1], args[2:]
+    fallos = 0
+    for ruta in args:
+        with open(ruta, encoding="utf-8", errors="ignore") as f:
+            diferencia = verificar_equivalencia(f.read(), plantilla)
+        if diferencia:
+            fallos += 1
+            print(f"❌ {ruta}\n{diferencia}")
+    print(f"✅ {len(args) - fallos}/{len(args)} capturas equivalentes")
+    sys.exit(1 if fallos else 0)
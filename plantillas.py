@@ -0,0 +1,114 @@
+import io
+import os
+import re
+import sys
+import threading
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   REGISTRO DE PLANTILLAS TEXTFSM (COMPILADAS UNA VEZ)
+# ╚════════════════════════════════════════════════════════════════╝
+
+# nombre -> (origen, archivo). origen "ntc" = carpeta de ntc-templates, "local" = ruta del proyecto
+PLANTILLAS = {
+    "show ip interface brief": ("ntc", "cisco_ios_show_ip_interface_brief.textfsm"),
+    "show interfaces": ("ntc", "cisco_ios_show_interfaces.textfsm"),
+    "show cdp neighbors detail": ("ntc", "cisco_ios_show_cdp_neighbors_detail.textfsm"),
+    "show mac address-table": ("ntc", "cisco_ios_show_mac-address-table.textfsm"),
+    "show ip arp": ("ntc", "cisco_ios_show_ip_arp.textfsm"),
+    # Template propio de int_status (relativo al directorio de trabajo, como int_status.TEMPLATE_FILE)
+    "Value.txt": ("local", "Value.txt"),
+}
+
+
+# Value [Opciones] NOMBRE (regex)
+RE_VALUE = re.compile(r"^Value\s+(?:(?:Filldown|Fillup|Key|Required|List)(?:,\w+)*\s+)?(\S+)\s+\(")
+
+
+def setup_ntc_templates():
+    """Detecta automáticamente la ruta de ntc_templates y la asigna a NET_TEXTFSM."""
+    try:
+        import ntc_templates
+        templates_path = os.path.join(os.path.dirname(ntc_templates.__file__), "templates")
+        if os.path.isdir(templates_path):
+            os.environ["NET_TEXTFSM"] = templates_path
+            print(f"✅ NET_TEXTFSM detectado: {templates_path}")
+        else:
+            print("⚠ No se encontró carpeta templates dentro de ntc_templates.")
+    except ImportError:
+        print("❌ ntc-templates no está instalado. Instálalo con: pip install ntc-templates")
+        sys.exit(1)
+
+
+def ruta_plantilla(nombre):
+    """Resuelve la ruta en disco de una plantilla registrada."""
+    origen, archivo = PLANTILLAS[nombre]
+    if origen == "local":
+        # Relativa al directorio de trabajo; si no está, junto a este módulo
+        if os.path.exists(archivo) or os.path.isabs(archivo):
+            return archivo
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), archivo)
+    if "NET_TEXTFSM" not in os.environ:
+        setup_ntc_templates()
+    return os.path.join(os.environ["NET_TEXTFSM"], archivo)
+
+
+class RegistroPlantillas:
+    """
+    Lee cada plantilla del disco una sola vez y la compila una vez por hilo.
+    Los objetos TextFSM guardan estado durante el parseo, así que cada hilo
+    tiene el suyo y se reinicia (Reset) antes de cada uso, que es casi gratis.
+    """
+
+    def __init__(self):
+        self._textos = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def registrar(self, nombre, ruta):
+        """Añade (o reemplaza) una plantilla local."""
+        with self._lock:
+            PLANTILLAS[nombre] = ("local", ruta)
+            self._textos.pop(nombre, None)
+        self._local = threading.local()
+
+    def _texto(self, nombre):
+        texto = self._textos.get(nombre)
+        if texto is None:
+            with self._lock:
+                texto = self._textos.get(nombre)
+                if texto is None:
+                    with open(ruta_plantilla(nombre)) as tpl:
+                        texto = tpl.read()
+                    self._textos[nombre] = texto
+        return texto
+
+    def cabecera(self, nombre):
+        """Columnas de la plantilla (sus líneas Value) sin importar ni compilar TextFSM."""
+        texto = self._texto(nombre)
+        return [m.group(1) for m in map(RE_VALUE.match, texto.splitlines()) if m]
+
+    def parser(self, nombre):
+        """Devuelve el TextFSM de este hilo para `nombre`, listo para usar."""
+        cache = getattr(self._local, "fsms", None)
+        if cache is None:
+            cache = self._local.fsms = {}
+        fsm = cache.get(nombre)
+        if fsm is None:
+            import textfsm  # sólo al compilar la primera plantilla del hilo
+            fsm = cache[nombre] = textfsm.TextFSM(io.StringIO(self._texto(nombre)))
+        else:
+            fsm.Reset()
+        return fsm
+
+    def parsear(self, nombre, salida):
+        """Parsea `salida` y devuelve (cabecera, filas)."""
+        fsm = self.parser(nombre)
+        filas = fsm.ParseText(salida)
+        return list(fsm.header), filas
+
+
+REGISTRO = RegistroPlantillas()
+
+
+def parsear(nombre, salida):
+    return REGISTRO.parsear(nombre, salida)
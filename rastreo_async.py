@@ -0,0 +1,274 @@
+import asyncio
+import contextvars
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import Get_switch
+from telemetria import TELEMETRIA
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   MOTOR DE RASTREO ASÍNCRONO (ASYNCIO SOBRE NETMIKO)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+# netmiko es bloqueante, así que cada llamada va a un hilo de un ejecutor propio.
+# Lo que se gana es solapar esperas:
+#   - el sondeo del puerto 22 corre a la vez que la conexión SSH;
+#   - si el pool ya tiene otra sesión libre con el equipo, la tabla CDP se
+#     descarga por ella mientras se buscan ARP y MAC (y el vecino sale de CACHE);
+#   - al conocer la tabla CDP se sondean ya todos los vecinos;
+#   - la conexión al siguiente salto arranca antes de cerrar el salto actual.
+
+MAX_RASTREOS_ASYNC = 32
+TIMEOUT_SESION = 60     # segundos esperando una sesión libre con un equipo
+
+
+class _Motor:
+    """
+    Estado compartido por los rastreos de un lote.
+    Un hilo bloqueado en POOL.obtener no puede ceder su sitio, así que las
+    sesiones se reservan antes de pasar a un hilo: cada equipo tiene un cupo
+    de POOL.max_por_host y sólo quien lo tiene pide sesión al pool. El ejecutor
+    es propio y da tres hilos por rastreo (salto actual, conexión al siguiente
+    y tabla CDP), de modo que quien tiene una sesión siempre encuentra hilo.
+    """
+
+    def __init__(self, concurrencia=1):
+        self.hilos = ThreadPoolExecutor(max_workers=3 * concurrencia, thread_name_prefix="rastreo")
+        self._cupos = {}   # host -> asyncio.Semaphore
+
+    def cupo(self, host):
+        if host not in self._cupos:
+            self._cupos[host] = asyncio.Semaphore(Get_switch.POOL.max_por_host)
+        return self._cupos[host]
+
+    async def en_hilo(self, funcion, *args):
+        """Como asyncio.to_thread (la traza de TELEMETRIA sigue al hilo) pero en self.hilos."""
+        contexto = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            self.hilos, functools.partial(contexto.run, funcion, *args))
+
+    def liberar(self, conn):
+        Get_switch.liberar(conn)
+        self.cupo(conn.host).release()
+
+    def cerrar(self):
+        self.hilos.shutdown(wait=False)
+
+
+async def puerto_abierto_async(host, port=22):
+    """Sondeo con la misma caché, timeout adaptativo y span que Get_switch.puerto_abierto."""
+    with TELEMETRIA.span("sondeo", host=host) as s:
+        s["cache"] = Get_switch.ALCANCE.conocido(host, port) is not None
+        if not await Get_switch.ALCANCE.sondear_async(host, port):
+            s["abierto"] = False
+            return False
+        return True
+
+
+def _devolver_si_sobra(tarea, motor):
+    """Si nadie va a usar una conexión ya pedida, devolverla al pool al terminar."""
+    def devolver(t):
+        if not t.cancelled() and t.exception() is None and t.result() is not None:
+            motor.liberar(t.result())
+    tarea.add_done_callback(devolver)
+
+
+async def _conectar(sw, motor):
+    """Reserva un cupo del equipo y conecta en un hilo. Devuelve la sesión o None."""
+    cupo = motor.cupo(sw["host"])
+    try:
+        await asyncio.wait_for(cupo.acquire(), TIMEOUT_SESION)
+    except asyncio.TimeoutError:
+        print(f"⚠️ Sin sesiones libres para {sw['host']} tras {TIMEOUT_SESION} s.")
+        return None
+    try:
+        conn = await motor.en_hilo(Get_switch.conectar, sw, TIMEOUT_SESION)
+    except BaseException:
+        cupo.release()
+        raise
+    if conn is None:
+        cupo.release()
+    return conn
+
+
+async def abrir(sw, sondeos, motor):
+    """Sondea el puerto 22 y conecta en paralelo. Devuelve la sesión o None."""
+    host = sw["host"]
+    sondeo = sondeos.get(host) or asyncio.ensure_future(puerto_abierto_async(host))
+    sondeos[host] = sondeo
+    conexion = asyncio.ensure_future(_conectar(sw, motor))
+    if not await sondeo:
+        print(f"⚠️ No se puede alcanzar {host} en el puerto 22. Deteniendo este salto.")
+        _devolver_si_sobra(conexion, motor)
+        return None
+    return await conexion
+
+
+def _precargar_cdp(sw):
+    """
+    Descarga la tabla CDP por otra sesión ya abierta con el equipo (llena Get_switch.CACHE).
+    Nunca abre una sesión nueva: si la libre ya no está, devuelve None y no se precarga.
+    """
+    conn = Get_switch.POOL.tomar_libre(sw["host"])
+    if conn is None:
+        return None
+    try:
+        tabla = Get_switch.CACHE.tabla(conn, "cdp")
+    except Exception:
+        Get_switch.POOL.devolver(conn, descartar=True)
+        raise
+    Get_switch.POOL.devolver(conn)
+    return tabla
+
+
+async def _precargar_cdp_async(sw, motor):
+    """_precargar_cdp con el cupo del equipo ya reservado por el llamador."""
+    try:
+        return await motor.en_hilo(_precargar_cdp, sw)
+    finally:
+        motor.cupo(sw["host"]).release()
+
+
+def _credenciales(raiz, host):
+    return {
+        "device_type": "cisco_ios",
+        "host": host,
+        "username": raiz["username"],
+        "password": raiz["password"],
+    }
+
+
+async def rastrear_async(sw, ip_buscada, motor=None):
+    """Misma ruta (mismas filas) que Get_switch.rastrear, con las esperas solapadas."""
+    propio = motor is None
+    motor = motor or _Motor()
+    try:
+        with TELEMETRIA.traza(ip_buscada):
+            return await _rastrear_async(sw, ip_buscada, motor)
+    finally:
+        if propio:
+            motor.cerrar()
+
+
+async def _rastrear_async(sw, ip_buscada, motor):
+    ruta = []
+    visitados = set()
+    sondeos = {}
+    actual = sw
+    siguiente = asyncio.ensure_future(abrir(actual, sondeos, motor))
+
+    while True:
+        visitados.add(actual["host"])
+        print(f"\n🔗 Conectando a {actual['host']} ...")
+        conn = await siguiente
+        if conn is None:
+            break
+
+        # Sólo merece la pena si la segunda sesión ya existe (abrir otra cuesta más que el comando)
+        # y queda cupo con el equipo; sin esperar, el cupo se toma ya
+        cupo = motor.cupo(actual["host"])
+        if Get_switch.POOL.hay_libre(actual["host"]) and not cupo.locked():
+            await cupo.acquire()
+            cdp = asyncio.ensure_future(_precargar_cdp_async(actual, motor))
+        else:
+            cdp = None
+        try:
+            hostname = (await motor.en_hilo(conn.find_prompt)).replace("#", "").strip()
+            mac_raw = await motor.en_hilo(Get_switch.obtener_mac_por_ip, conn, ip_buscada)
+            if not mac_raw:
+                print(f"⚠️ No se encontró la IP {ip_buscada} en {hostname}")
+                break
+            mac_norm = Get_switch.normalizar_mac(mac_raw)
+            print(f"✅ {hostname}: IP {ip_buscada} → MAC {mac_norm}")
+
+            info = await motor.en_hilo(Get_switch.buscar_mac_table, conn, mac_raw)
+            if not info:
+                print(f"⚠️ No se encontró la MAC {mac_norm} en {hostname}")
+                break
+            vlan, intf = info["vlan"], info["intf"]
+            print(f"🔎 MAC encontrada en {intf} (VLAN {vlan})")
+
+            try:
+                vecinos = await cdp if cdp else None
+            except Exception:
+                vecinos = None
+            if vecinos is not None:
+                # Sondear ya todos los vecinos: el que toque estará resuelto al llegar
+                for ip_vecino in vecinos.values():
+                    if ip_vecino not in sondeos:
+                        sondeos[ip_vecino] = asyncio.ensure_future(puerto_abierto_async(ip_vecino))
+
+            # Con la tabla precargada sale de CACHE; si no, CACHE elige consulta filtrada o tabla
+            vecino_ip = await motor.en_hilo(Get_switch.obtener_ip_cdp_por_interfaz, conn, intf)
+            if vecino_ip:
+                print(f"🔁 Se detectó vecino en {intf} con IP {vecino_ip} → conectando al switch vecino...")
+                ruta.append({"sw_name": hostname, "ip_sw": actual["host"], "puerto": intf, "vlan": vlan, "next_ip": vecino_ip})
+                if vecino_ip in visitados:
+                    print(f"⚠️ Ya se visitó {vecino_ip}, deteniendo bucle.")
+                    break
+                actual = _credenciales(sw, vecino_ip)
+                # Arranca la conexión al vecino antes de liberar esta sesión
+                siguiente = asyncio.ensure_future(abrir(actual, sondeos, motor))
+                continue
+
+            print(f"🏁 No se detectó vecino CDP en {intf}. Se asume dispositivo final conectado en {hostname}:{intf}")
+            ruta.append({
+                "sw_name": hostname,
+                "ip_sw": actual["host"],
+                "puerto": intf,
+                "vlan": vlan,
+                "mac_device": mac_norm,
+                "ip_device": ip_buscada,
+            })
+            break
+        except BaseException:
+            # Una sesión que falló a medio comando no vuelve al pool
+            Get_switch.POOL.devolver(conn, descartar=True)
+            motor.cupo(conn.host).release()
+            conn = None
+            raise
+        finally:
+            if cdp and not cdp.done():
+                cdp.add_done_callback(lambda t: t.cancelled() or t.exception())
+            if conn is not None:
+                motor.liberar(conn)
+
+    for sondeo in sondeos.values():
+        sondeo.cancel()
+    return ruta
+
+
+async def rastrear_lote_async(sw, ips, concurrencia=MAX_RASTREOS_ASYNC):
+    """Rastrea varias IPs a la vez; devuelve {ip: ruta}."""
+    limite = asyncio.Semaphore(concurrencia)
+    motor = _Motor(concurrencia)
+    Get_switch.CACHE.registrar_pendientes(sw["host"], len(ips))
+
+    async def uno(ip):
+        async with limite:
+            try:
+                return ip, await rastrear_async(sw, ip, motor)
+            except Exception as e:
+                print(f"⚠️ Error rastreando {ip}: {e}")
+                return ip, []
+
+    try:
+        return dict(await asyncio.gather(*(uno(ip) for ip in ips)))
+    finally:
+        motor.cerrar()
+
+
+def rastrear(sw, ip_buscada):
+    """Versión síncrona del motor asíncrono (mismo contrato que Get_switch.rastrear)."""
+    return asyncio.run(rastrear_async(sw, ip_buscada))
+
+
+if __name__ == "__main__":
+    # python rastreo_async.py 192.168.1.20 [192.168.1.21 ...]
+    resultados = asyncio.run(rastrear_lote_async(Get_switch.ROOT_SWITCH, sys.argv[1:]))
+    for ip, ruta in resultados.items():
+        print(f"\n=== {ip} ===")
+        for salto in ruta:
+            print(salto)
+    Get_switch.POOL.cerrar_todo()
@@ -0,0 +1,122 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import basic_config
+from almacen import registros_desde_df
+from archivo_crudo import archivar
+from monitor_interfaces import leer_inventario
+from ssh_pool import conectar_netmiko
+from telemetria import conectar_instrumentado
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   RECOLECCIÓN DE INTERFACES POR SSH EN PARALELO (INVENTARIO)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+#   python recoleccion_ssh.py routers.csv                -> routers_ip.csv / routers_ip.db (como basic_config)
+#   python recoleccion_ssh.py ips.txt --usuario u --password p --workers 64
+#
+# Inventario: CSV con columna Host (o IP) y opcionalmente User/Password, como
+# el de monitor_interfaces; o un texto con una IP por línea.
+# Cada router se guarda con su IP como clave (Router_IP), igual que la opción 1
+# de basic_config, y todos los resultados se escriben en una sola transacción.
+
+MAX_CONEXIONES_PARALELAS = 32
+TIMEOUT_CONEXION = 10    # segundos para abrir la sesión SSH
+TIMEOUT_COMANDO = 30     # segundos de lectura por comando
+
+
+def leer_equipos(ruta, usuario=None, password=None):
+    """Inventario -> lista de credenciales netmiko (una por host, sin repetir)."""
+    if ruta.lower().endswith(".csv"):
+        entradas = [(e["host"], e["usuario"], e["password"]) for e in leer_inventario(ruta) if e["host"]]
+    else:
+        with open(ruta, encoding="utf-8-sig") as f:
+            entradas = [(linea.split("#", 1)[0].strip(), "", "") for linea in f]
+    usuario = usuario or os.environ.get("NETOPS_USUARIO", "")
+    password = password or os.environ.get("NETOPS_PASSWORD", "")
+    equipos = {}
+    for host, u, p in entradas:
+        if host and host not in equipos:
+            equipos[host] = {
+                "device_type": "cisco_ios",
+                "host": host,
+                "username": u or usuario,
+                "password": p or password,
+                "conn_timeout": TIMEOUT_CONEXION,
+            }
+    return list(equipos.values())
+
+
+def recolectar_equipo(sw, conectar, timeout=TIMEOUT_COMANDO):
+    """Abre la sesión, ejecuta los comandos y devuelve los registros del almacén."""
+    conn = conectar(sw)
+    try:
+        conn.send_command("terminal length 0", read_timeout=timeout)
+        output = conn.send_command("show ip interface brief", read_timeout=timeout)
+    finally:
+        conn.disconnect()
+    archivar(sw["host"], "show ip interface brief", output)
+    return registros_desde_df(basic_config.parse_show_ip_interface_brief(output))
+
+
+def recolectar(equipos, csv_path=basic_config.CSV_POR_DEFECTO, max_workers=MAX_CONEXIONES_PARALELAS,
+               timeout=TIMEOUT_COMANDO, conectar=None):
+    """
+    Recolecta todos los equipos en paralelo y los guarda de una vez en el almacén
+    de `csv_path` (basic_config.abrir_almacen); exporta el CSV al final.
+    Devuelve (resultados {host: registros}, errores {host: mensaje}).
+    """
+    conectar = conectar or conectar_instrumentado(conectar_netmiko)
+    resultados, errores = {}, {}
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(equipos)))) as pool:
+        futuros = {pool.submit(recolectar_equipo, sw, conectar, timeout): sw["host"] for sw in equipos}
+        for futuro in as_completed(futuros):
+            host = futuros[futuro]
+            try:
+                registros = futuro.result()
+            except Exception as e:
+                print(f"❌ {host}: {e}")
+                errores[host] = str(e)
+                continue
+            if not registros:
+                print(f"⚠ {host}: no se pudieron extraer interfaces.")
+                errores[host] = "sin interfaces"
+                continue
+            print(f"✅ {host}: {len(registros)} interfaces")
+            resultados[host] = registros
+
+    if resultados:
+        almacen = basic_config.abrir_almacen(csv_path)
+        # Mismo orden que el inventario
+        almacen.guardar_varios((sw["host"], resultados[sw["host"]]) for sw in equipos if sw["host"] in resultados)
+        try:
+            almacen.exportar_csv(csv_path)
+        except ValueError as e:
+            print(f"⚠ {e}")
+    print(f"⏱️ {len(resultados)}/{len(equipos)} equipos en {time.perf_counter() - inicio:.1f} s")
+    return resultados, errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="show ip interface brief por SSH en toda la flota.")
+    parser.add_argument("inventario", help="CSV con columna Host/IP o archivo con una IP por línea")
+    parser.add_argument("--usuario", help="por defecto NETOPS_USUARIO o la columna User")
+    parser.add_argument("--password", help="por defecto NETOPS_PASSWORD o la columna Password")
+    parser.add_argument("--csv", default=os.environ.get("BASIC_CONFIG_CSV", basic_config.CSV_POR_DEFECTO))
+    parser.add_argument("--workers", type=int, default=MAX_CONEXIONES_PARALELAS)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_COMANDO, help="segundos por comando")
+    args = parser.parse_args()
+
+    equipos = leer_equipos(args.inventario, args.usuario, args.password)
+    if not equipos:
+        print(f"⚠ {args.inventario} no tiene equipos con IP.")
+        return
+    print(f"📋 {len(equipos)} equipos; {min(args.workers, len(equipos))} conexiones simultáneas")
+    recolectar(equipos, args.csv, args.workers, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import csv
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   CSV Y TABLAS DE TEXTO SIN PANDAS (ARRANQUE RÁPIDO)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+# Para las salidas de pocas filas (una ruta, un resultado de lote) importar
+# pandas cuesta más que todo lo demás; esto cubre df.to_csv y df.to_string.
+
+
+def columnas_de(filas):
+    """Columnas en orden de aparición (como pd.DataFrame con una lista de dicts)."""
+    columnas = []
+    for fila in filas:
+        for k in fila:
+            if k not in columnas:
+                columnas.append(k)
+    return columnas
+
+
+def escribir_csv(filas, salida):
+    """Escribe las filas (dicts) en `salida`: un archivo abierto o una ruta."""
+    if isinstance(salida, str):
+        with open(salida, "w", newline="", encoding="utf-8") as f:
+            return escribir_csv(filas, f)
+    writer = csv.DictWriter(salida, fieldnames=columnas_de(filas), restval="")
+    writer.writeheader()
+    writer.writerows(filas)
+
+
+def tabla_texto(filas):
+    """Tabla alineada a la derecha, como df.to_string(index=False)."""
+    columnas = columnas_de(filas)
+    celdas = [[str(c) for c in columnas]] + [
+        ["" if fila.get(c) is None else str(fila.get(c)) for c in columnas] for fila in filas
+    ]
+    anchos = [max(len(f[i]) for f in celdas) for i in range(len(columnas))]
+    return "\n".join(" ".join(v.rjust(a) for v, a in zip(f, anchos)) for f in celdas)
@@ -0,0 +1,161 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from telemetria import TELEMETRIA
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   POOL DE SESIONES SSH (NETMIKO) POR HOST
+# ╚════════════════════════════════════════════════════════════════╝
+
+MAX_POR_HOST = 2        # sesiones simultáneas permitidas por equipo
+MAX_INACTIVIDAD = 120   # segundos que una sesión libre puede quedar abierta
+
+
+def conectar_netmiko(sw):
+    """Conexión por defecto; netmiko se importa aquí para no pagarlo al arrancar."""
+    from netmiko import ConnectHandler
+    return ConnectHandler(**sw)
+
+
+class PoolSSH:
+    """
+    Reutiliza sesiones netmiko entre saltos y entre rastreos.
+    Cada sesión se presta en exclusiva (netmiko no es seguro entre hilos);
+    al devolverla queda libre para el siguiente que pida el mismo host.
+    """
+
+    def __init__(self, max_por_host=MAX_POR_HOST, max_inactividad=MAX_INACTIVIDAD, conectar=None):
+        self.max_por_host = max_por_host
+        self.max_inactividad = max_inactividad
+        self._conectar = conectar or conectar_netmiko
+        self._libres = {}     # host -> [(conn, ultimo_uso)]
+        self._en_uso = {}     # host -> número de sesiones prestadas o abiertas
+        self._cond = threading.Condition()
+
+    def hay_libre(self, host):
+        """True si hay una sesión abierta y libre para `host` (reutilizarla no cuesta login)."""
+        with self._cond:
+            return bool(self._libres.get(host))
+
+    @staticmethod
+    def _viva(conn):
+        """Comprueba la sesión pidiendo el prompt."""
+        try:
+            return bool(conn.find_prompt())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _cerrar(conn):
+        try:
+            conn.disconnect()
+        except Exception:
+            pass
+
+    def obtener(self, sw, timeout=None):
+        """
+        Devuelve una sesión para sw["host"], reutilizando una libre si sigue viva.
+        Bloquea si el equipo ya tiene max_por_host sesiones prestadas.
+        Las excepciones de conexión se propagan al llamador.
+        """
+        host = sw["host"]
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                self._purgar_inactivas()
+                libres = self._libres.get(host)
+                if libres:
+                    conn, _ = libres.pop()
+                    self._en_uso[host] = self._en_uso.get(host, 0) + 1
+                    reutilizada = True
+                elif self._en_uso.get(host, 0) + len(self._libres.get(host, [])) < self.max_por_host:
+                    self._en_uso[host] = self._en_uso.get(host, 0) + 1
+                    conn = None
+                    reutilizada = False
+                else:
+                    restante = None if limite is None else limite - time.monotonic()
+                    if restante is not None and restante <= 0:
+                        raise TimeoutError(f"Sin sesiones libres para {host}")
+                    self._cond.wait(restante)
+                    continue
+
+            # Conectar / verificar fuera del candado para no bloquear otros hosts
+            if reutilizada:
+                if self._viva(conn):
+                    return conn
+                self._cerrar(conn)
+            try:
+                if not reutilizada:
+                    return self._conectar(sw)
+                # La sesión libre estaba muerta: el nuevo login cuenta como reintento
+                with TELEMETRIA.span("reconexion", host=host, reintentos=1):
+                    return self._conectar(sw)
+            except Exception:
+                with self._cond:
+                    self._en_uso[host] -= 1
+                    self._cond.notify_all()
+                raise
+
+    def tomar_libre(self, host):
+        """Presta una sesión ya abierta y viva de `host` sin hacer login nunca; None si no la hay."""
+        with self._cond:
+            libres = self._libres.get(host)
+            if not libres:
+                return None
+            conn, _ = libres.pop()
+            self._en_uso[host] = self._en_uso.get(host, 0) + 1
+        if self._viva(conn):
+            return conn
+        self.devolver(conn, descartar=True)
+        return None
+
+    def devolver(self, conn, descartar=False):
+        """Devuelve la sesión al pool (o la cierra si `descartar`)."""
+        host = conn.host
+        with self._cond:
+            self._en_uso[host] = max(self._en_uso.get(host, 0) - 1, 0)
+            if not descartar:
+                self._libres.setdefault(host, []).append((conn, time.monotonic()))
+            self._cond.notify_all()
+        if descartar:
+            self._cerrar(conn)
+
+    @contextmanager
+    def sesion(self, sw, timeout=None):
+        """Uso: with POOL.sesion(sw) as conn: ..."""
+        conn = self.obtener(sw, timeout=timeout)
+        try:
+            yield conn
+        except Exception:
+            self.devolver(conn, descartar=True)
+            raise
+        else:
+            self.devolver(conn)
+
+    def _purgar_inactivas(self):
+        """Cierra sesiones libres que superan max_inactividad (llamar con el candado)."""
+        ahora = time.monotonic()
+        for host, libres in list(self._libres.items()):
+            vigentes = []
+            for conn, ultimo in libres:
+                if ahora - ultimo > self.max_inactividad:
+                    self._cerrar(conn)
+                else:
+                    vigentes.append((conn, ultimo))
+            if vigentes:
+                self._libres[host] = vigentes
+            else:
+                del self._libres[host]
+
+    def purgar(self):
+        with self._cond:
+            self._purgar_inactivas()
+
+    def cerrar_todo(self):
+        """Cierra todas las sesiones libres."""
+        with self._cond:
+            for libres in self._libres.values():
+                for conn, _ in libres:
+                    self._cerrar(conn)
+            self._libres.clear()
@@ -0,0 +1,304 @@
+import re
+import threading
+import time
+
+from flujo import leer_netmiko, lineas
+from tablas_compactas import TablaARP, TablaMAC, int_a_mac, mac_a_int
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   CACHÉ DE TABLAS ARP / MAC / CDP / IP POR EQUIPO
+# ╚════════════════════════════════════════════════════════════════╝
+
+TTL_TABLAS = 60  # segundos que una tabla descargada se considera válida
+UMBRAL_TABLA = 8  # consultas a un mismo equipo (pendientes + recientes) a partir de las cuales conviene bajar la tabla entera
+
+RE_MAC = re.compile(r"\b([0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}|(?:[0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2})\b")
+RE_IPV4 = re.compile(r"\d+\.\d+\.\d+\.\d+")
+RE_ARP = re.compile(r"^[ \t]*Internet\s+(\d+\.\d+\.\d+\.\d+)\s+\S+\s+([0-9a-fA-F\.:-]+)\s+ARPA", re.M)
+RE_VLAN_IP = re.compile(r"^Vlan(\d+)\s+(\d+\.\d+\.\d+\.\d+)")
+RE_CDP_IP = re.compile(r"IP(?:v4)? address:\s*(\d+\.\d+\.\d+\.\d+)|^\s*IP\s*:\s*(\d+\.\d+\.\d+\.\d+)", re.M)
+RE_CDP_INTF = re.compile(r"Interface:\s*([^,\s]+)")
+
+# Abreviaturas de Cisco -> nombre completo (orden: prefijos largos primero)
+ABREVIATURAS = [
+    ("hundredgige", "HundredGigE"),
+    ("fortygigabitethernet", "FortyGigabitEthernet"),
+    ("twentyfivegige", "TwentyFiveGigE"),
+    ("tengigabitethernet", "TenGigabitEthernet"),
+    ("twogigabitethernet", "TwoGigabitEthernet"),
+    ("gigabitethernet", "GigabitEthernet"),
+    ("fastethernet", "FastEthernet"),
+    ("port-channel", "Port-channel"),
+    ("ethernet", "Ethernet"),
+    ("hu", "HundredGigE"),
+    ("fo", "FortyGigabitEthernet"),
+    ("twe", "TwentyFiveGigE"),
+    ("tw", "TwoGigabitEthernet"),
+    ("te", "TenGigabitEthernet"),
+    ("gi", "GigabitEthernet"),
+    ("fa", "FastEthernet"),
+    ("po", "Port-channel"),
+    ("eth", "Ethernet"),
+    ("et", "Ethernet"),
+]
+
+
+def normalizar_interfaz(intf):
+    """'Gi1/0/1' y 'GigabitEthernet1/0/1' -> 'GigabitEthernet1/0/1'."""
+    m = re.match(r"^([A-Za-z-]+)\s*(.*)$", intf.strip())
+    if not m:
+        return intf.strip()
+    prefijo, resto = m.group(1).lower(), m.group(2)
+    for abrev, completo in ABREVIATURAS:
+        if prefijo == abrev:
+            return completo + resto
+    return intf.strip()
+
+
+def mac_sin_separadores(mac):
+    return mac.replace('.', '').replace(':', '').replace('-', '').lower()
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   PARSERS: SALIDA COMPLETA -> ÍNDICE (dict)
+# ╚════════════════════════════════════════════════════════════════╝
+
+def indexar_arp(output):
+    """show ip arp -> TablaARP (get(ip) = mac sin separadores, como un dict)"""
+    return TablaARP.desde_pares(RE_ARP.findall(output))
+
+
+def pares_arp(lineas_salida):
+    """Líneas de show ip arp (p. ej. flujo.lineas) -> (ip, mac) a medida que llegan."""
+    for line in lineas_salida:
+        m = RE_ARP.match(line)
+        if m:
+            yield m.groups()
+
+
+def filas_mac_table(lineas_salida):
+    """Líneas de show mac address-table -> (mac, vlan, interfaz) a medida que llegan."""
+    for line in lineas_salida:
+        m = RE_MAC.search(line)
+        if not m:
+            continue
+        antes = line[:m.start()].split()
+        despues = line[m.end():].split()
+        vlan = next((p for p in reversed(antes) if p.isdigit()), None)
+        if vlan is None or not despues:
+            continue
+        yield m.group(1), vlan, despues[-1]
+
+
+def indexar_mac_table(output):
+    """
+    show mac address-table -> TablaMAC (get(mac) = {"vlan", "intf"}, como un dict).
+    Si una MAC aparece varias veces se conserva la primera (como el recorrido original).
+    """
+    return TablaMAC.desde_filas(filas_mac_table(output.splitlines()))
+
+
+def vecinos_cdp(output):
+    """show cdp neighbors detail -> lista de vecinos (interfaz, ip, device_id, capacidades)"""
+    vecinos = []
+    for bloque in re.split(r"^-{5,}\s*$", output, flags=re.M):
+        m_intf = RE_CDP_INTF.search(bloque)
+        m_ip = RE_CDP_IP.search(bloque)
+        if not (m_intf and m_ip):
+            continue
+        m_id = re.search(r"Device ID:\s*(\S+)", bloque)
+        m_cap = re.search(r"Capabilities:\s*(.*)$", bloque, re.M)
+        vecinos.append({
+            "interfaz": normalizar_interfaz(m_intf.group(1)),
+            "ip": m_ip.group(1) or m_ip.group(2),
+            "device_id": m_id.group(1) if m_id else "",
+            "capacidades": m_cap.group(1).strip() if m_cap else "",
+        })
+    return vecinos
+
+
+def indexar_cdp_detalle(output):
+    """show cdp neighbors detail -> {interfaz local normalizada: ip del vecino}"""
+    indice = {}
+    for v in vecinos_cdp(output):
+        indice.setdefault(v["interfaz"], v["ip"])
+    return indice
+
+
+def indexar_ip_vlan(output):
+    """show ip interface brief -> {numero de vlan (str): ip}"""
+    indice = {}
+    for line in output.splitlines():
+        m = RE_VLAN_IP.search(line.strip())
+        if m:
+            indice[m.group(1)] = m.group(2)
+    return indice
+
+
+def mac_formato_cisco(mac):
+    """'001b78420a00' -> '001b.7842.0a00'"""
+    return int_a_mac(mac_a_int(mac), "cisco")
+
+
+def _vecino_de_salida(output, interfaz):
+    indice = indexar_cdp_detalle(output)
+    if interfaz in indice:
+        return indice[interfaz]
+    # Salida de una sola interfaz: vale la única IP que aparezca
+    m = RE_CDP_IP.search(output)
+    return (m.group(1) or m.group(2)) if m else None
+
+
+def _ip_de_interfaz_vlan(output, _vlan):
+    m = re.search(r"Internet address is (\d+\.\d+\.\d+\.\d+)", output)
+    return m.group(1) if m else None
+
+
+# Consultas filtradas en el equipo: tipo -> (comando para una clave, extractor(salida, clave))
+CONSULTAS = {
+    "arp": (lambda ip: f"show ip arp {ip}", lambda out, ip: indexar_arp(out).get(ip)),
+    "mac": (
+        lambda mac: f"show mac address-table address {mac_formato_cisco(mac)}",
+        lambda out, mac: indexar_mac_table(out).get(mac),
+    ),
+    "cdp": (lambda intf: f"show cdp neighbors {intf} detail", _vecino_de_salida),
+    "vlan_ip": (lambda vlan: f"show interfaces vlan {vlan}", _ip_de_interfaz_vlan),
+}
+
+TABLAS = {
+    "arp": ("show ip arp", indexar_arp),
+    "mac": ("show mac address-table", indexar_mac_table),
+    "cdp": ("show cdp neighbors detail", indexar_cdp_detalle),
+    "vlan_ip": ("show ip interface brief", indexar_ip_vlan),
+}
+
+# Tablas que pueden ser enormes en un core: se parsean en flujo mientras llegan
+FLUJOS = {
+    "arp": lambda lineas_salida: TablaARP.desde_pares(pares_arp(lineas_salida)),
+    "mac": lambda lineas_salida: TablaMAC.desde_filas(filas_mac_table(lineas_salida)),
+}
+
+
+def descargar_tabla(conn, tipo):
+    """Ejecuta el comando de la tabla `tipo` y devuelve su índice (en flujo si se puede)."""
+    comando, parser = TABLAS[tipo]
+    if tipo in FLUJOS:
+        return FLUJOS[tipo](lineas(leer_netmiko(conn, comando)))
+    return parser(conn.send_command(comando))
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   CACHÉ CON TTL
+# ╚════════════════════════════════════════════════════════════════╝
+
+class CacheTablas:
+    """
+    Guarda, por host, los índices de cada tabla durante `ttl` segundos.
+    La primera consulta descarga y parsea la tabla completa; las siguientes
+    se resuelven en O(1) sobre el diccionario.
+    """
+
+    def __init__(self, ttl=TTL_TABLAS):
+        self.ttl = ttl
+        self._datos = {}      # (host, tipo) -> (instante, indice)
+        self._candados = {}   # (host, tipo) -> Lock, evita descargas duplicadas
+        self._puntuales = {}  # (host, tipo, clave) -> (instante, valor) de consultas filtradas
+        self._pendientes = {}  # host -> (instante, n) aviso de consultas que vienen
+        self._recientes = {}  # host -> [instantes de consultas filtradas]
+        self._ultima_purga = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _candado(self, clave):
+        with self._lock:
+            return self._candados.setdefault(clave, threading.Lock())
+
+    def vigente(self, host, tipo):
+        """Devuelve el índice si está en caché y no ha expirado, o None."""
+        entrada = self._datos.get((host, tipo))
+        if entrada and time.monotonic() - entrada[0] < self.ttl:
+            return entrada[1]
+        return None
+
+    def tabla(self, conn, tipo):
+        """Devuelve el índice `tipo` del equipo de `conn`, descargándolo si hace falta."""
+        clave = (conn.host, tipo)
+        indice = self.vigente(*clave)
+        if indice is not None:
+            return indice
+        with self._candado(clave):
+            indice = self.vigente(*clave)
+            if indice is None:
+                indice = descargar_tabla(conn, tipo)
+                self._datos[clave] = (time.monotonic(), indice)
+        return indice
+
+    # ── Estrategia: consulta filtrada o tabla completa ──
+
+    def registrar_pendientes(self, host, n):
+        """Avisa de que se van a hacer unas `n` consultas contra `host` (vale durante el TTL)."""
+        with self._lock:
+            self._pendientes[host] = (time.monotonic(), n)
+
+    def _demanda(self, host):
+        """Consultas esperadas contra el host: avisadas + filtradas hechas dentro del TTL."""
+        ahora = time.monotonic()
+        with self._lock:
+            instante, n = self._pendientes.get(host, (0, 0))
+            if ahora - instante >= self.ttl:
+                n = 0
+            recientes = [t for t in self._recientes.get(host, []) if ahora - t < self.ttl]
+            self._recientes[host] = recientes
+            return n + len(recientes)
+
+    def buscar(self, conn, tipo, clave):
+        """
+        Resuelve una clave (IP, MAC, interfaz o VLAN) en el equipo de `conn`:
+          - si la tabla completa está en caché, O(1) sobre el índice;
+          - si hay muchas consultas para ese equipo, baja la tabla entera;
+          - si no, lanza el comando filtrado (sólo viaja una línea).
+        """
+        host = conn.host
+        indice = self.vigente(host, tipo)
+        if indice is None and self._demanda(host) >= UMBRAL_TABLA:
+            indice = self.tabla(conn, tipo)
+        if indice is not None:
+            return indice.get(clave)
+
+        entrada = self._puntuales.get((host, tipo, clave))
+        if entrada and time.monotonic() - entrada[0] < self.ttl:
+            return entrada[1]
+        comando, extraer = CONSULTAS[tipo]
+        valor = extraer(conn.send_command(comando(clave)), clave)
+        ahora = time.monotonic()
+        with self._lock:
+            self._puntuales[(host, tipo, clave)] = (ahora, valor)
+            self._recientes.setdefault(host, []).append(ahora)
+            if ahora - self._ultima_purga >= self.ttl:
+                self._purgar(ahora)
+        return valor
+
+    def _purgar(self, ahora):
+        """Quita las consultas filtradas caducadas (una vez por TTL, con el lock tomado)."""
+        self._ultima_purga = ahora
+        for clave, (instante, _) in list(self._puntuales.items()):
+            if ahora - instante >= self.ttl:
+                del self._puntuales[clave]
+        for host, instantes in list(self._recientes.items()):
+            vigentes = [t for t in instantes if ahora - t < self.ttl]
+            if vigentes:
+                self._recientes[host] = vigentes
+            else:
+                del self._recientes[host]
+
+    def invalidar(self, host=None):
+        """Olvida las tablas de un host (o de todos)."""
+        with self._lock:
+            for clave in list(self._datos):
+                if host is None or clave[0] == host:
+                    del self._datos[clave]
+            for clave in list(self._puntuales):
+                if host is None or clave[0] == host:
+                    del self._puntuales[clave]
+            for clave in list(self._recientes):
+                if host is None or clave == host:
+                    del self._recientes[clave]
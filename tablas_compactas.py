@@ -0,0 +1,167 @@
+import socket
+from array import array
+from bisect import bisect_left
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   TABLAS ARP / MAC COMPACTAS (ENTEROS EN ARRAYS COLUMNARES)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+# Una MAC es un entero de 48 bits y una IPv4 uno de 32: cada entrada ARP ocupa
+# 12 bytes (en un dict de strings, cientos). Las columnas van ordenadas por la
+# clave y se buscan por bisección; las interfaces se guardan una vez y cada
+# entrada sólo lleva su índice. Las tablas responden a get/items/len como los
+# dicts de tablas_cache, así que el resto del código no cambia.
+# Con NumPy instalado, buscar_varios() resuelve lotes de claves vectorizado.
+
+
+# ── Conversiones texto <-> entero ──
+
+def mac_a_int(mac):
+    """'001b.7842.0a00', '00:1B:78:42:0A:00' o '001b78420a00' -> entero de 48 bits."""
+    plano = mac.replace(".", "").replace(":", "").replace("-", "")
+    if len(plano) != 12:
+        raise ValueError(f"MAC no válida: {mac!r}")
+    return int(plano, 16)
+
+
+def int_a_mac(n, formato="plano"):
+    """formato: 'plano' (001b78420a00), 'cisco' (001b.7842.0a00) o 'dos_puntos' (00:1b:78:42:0a:00)."""
+    h = f"{n:012x}"
+    if formato == "cisco":
+        return f"{h[0:4]}.{h[4:8]}.{h[8:12]}"
+    if formato == "dos_puntos":
+        return f"{h[0:2]}:{h[2:4]}:{h[4:6]}:{h[6:8]}:{h[8:10]}:{h[10:12]}"
+    return h
+
+
+def ip_a_int(ip):
+    return int.from_bytes(socket.inet_aton(ip), "big")
+
+
+def int_a_ip(n):
+    return socket.inet_ntoa(n.to_bytes(4, "big"))
+
+
+class _TablaOrdenada:
+    """Columna de claves ordenada (array) con búsqueda por bisección."""
+
+    claves = None
+
+    def _posicion(self, clave):
+        i = bisect_left(self.claves, clave)
+        return i if i < len(self.claves) and self.claves[i] == clave else -1
+
+    def __len__(self):
+        return len(self.claves)
+
+    def __contains__(self, clave):
+        return self.get(clave) is not None
+
+    def __getitem__(self, clave):
+        valor = self.get(clave)
+        if valor is None:
+            raise KeyError(clave)
+        return valor
+
+    def posiciones(self, claves_int):
+        """Índice de cada clave entera en la tabla (-1 si no está); vectorizado con NumPy si existe."""
+        try:
+            import numpy as np
+        except ImportError:
+            return [self._posicion(c) for c in claves_int]
+        tabla = np.frombuffer(self.claves, dtype=np.uint64 if self.claves.typecode == "Q" else np.uint32)
+        buscadas = np.asarray(claves_int, dtype=tabla.dtype)
+        pos = np.searchsorted(tabla, buscadas)
+        pos_validas = np.minimum(pos, max(len(tabla) - 1, 0))
+        encontrada = (pos < len(tabla)) & (tabla[pos_validas] == buscadas) if len(tabla) else np.zeros(len(buscadas), bool)
+        return np.where(encontrada, pos, -1).tolist()
+
+
+class TablaARP(_TablaOrdenada):
+    """IP (uint32) -> MAC (uint48 en uint64). get(ip) devuelve la MAC sin separadores."""
+
+    def __init__(self, indice=None):
+        """indice: {ip entero: mac entero}."""
+        indice = indice or {}
+        self.claves = array("I", sorted(indice))
+        self.macs = array("Q", map(indice.__getitem__, self.claves))
+
+    @classmethod
+    def desde_pares(cls, pares):
+        """pares: (ip texto, mac texto) en el orden de la salida del equipo; si una IP se repite vale la última."""
+        indice = {}
+        for ip, mac in pares:
+            try:
+                indice[ip_a_int(ip)] = mac_a_int(mac)
+            except (OSError, ValueError):
+                continue
+        return cls(indice)
+
+    def get(self, ip, defecto=None):
+        try:
+            i = self._posicion(ip_a_int(ip))
+        except OSError:
+            return defecto
+        return int_a_mac(self.macs[i]) if i >= 0 else defecto
+
+    def buscar_varios(self, ips):
+        """[ip texto] -> [mac sin separadores o None]."""
+        pos = self.posiciones([ip_a_int(ip) for ip in ips])
+        return [int_a_mac(self.macs[i]) if i >= 0 else None for i in pos]
+
+    def pares_int(self):
+        return zip(self.claves, self.macs)
+
+    def items(self):
+        for ip, mac in self.pares_int():
+            yield int_a_ip(ip), int_a_mac(mac)
+
+
+class TablaMAC(_TablaOrdenada):
+    """MAC (uint64) -> VLAN (uint16) + interfaz (índice en una lista de nombres únicos)."""
+
+    def __init__(self, indice=None, interfaces=()):
+        """indice: {mac entero: (vlan, posición en `interfaces`)}."""
+        indice = indice or {}
+        self.interfaces = list(interfaces)
+        self.claves = array("Q", sorted(indice))
+        entradas = [indice[m] for m in self.claves]
+        self.vlans = array("H", [v for v, _ in entradas])
+        self.intfs = array("H" if len(self.interfaces) <= 0xFFFF else "I", [i for _, i in entradas])
+
+    @classmethod
+    def desde_filas(cls, filas):
+        """filas: (mac texto, vlan texto, interfaz) en el orden de la salida; si una MAC se repite vale la primera."""
+        indice, interfaces = {}, {}
+        for mac, vlan, intf in filas:
+            try:
+                clave = mac_a_int(mac)
+            except ValueError:
+                continue
+            if clave not in indice:
+                indice[clave] = (int(vlan), interfaces.setdefault(intf, len(interfaces)))
+        return cls(indice, interfaces)
+
+    def _entrada(self, i):
+        return {"vlan": str(self.vlans[i]), "intf": self.interfaces[self.intfs[i]]}
+
+    def get(self, mac, defecto=None):
+        try:
+            i = self._posicion(mac_a_int(mac))
+        except ValueError:
+            return defecto
+        return self._entrada(i) if i >= 0 else defecto
+
+    def buscar_varios(self, macs):
+        """[mac en cualquier formato] -> [{"vlan", "intf"} o None]."""
+        pos = self.posiciones([mac_a_int(m) for m in macs])
+        return [self._entrada(i) if i >= 0 else None for i in pos]
+
+    def filas_int(self):
+        """(mac entero, vlan, interfaz) sin pasar por texto."""
+        for mac, vlan, intf in zip(self.claves, self.vlans, self.intfs):
+            yield mac, vlan, self.interfaces[intf]
+
+    def items(self):
+        for i, mac in enumerate(self.claves):
+            yield int_a_mac(mac), self._entrada(i)
@@ -0,0 +1,193 @@
+import atexit
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   TELEMETRÍA: SPANS POR SALTO Y POR COMANDO (JSONL + PROMETHEUS)
+# ╚════════════════════════════════════════════════════════════════╝
+#
+#   TELEMETRIA_JSONL=spans.jsonl   -> un JSON por span (traza, salto, host, comando, duración, bytes...)
+#   TELEMETRIA_PROM=metricas.prom  -> resumen en formato texto de Prometheus (se escribe al salir)
+
+_traza = contextvars.ContextVar("traza", default=None)
+_salto = contextvars.ContextVar("salto", default=None)
+
+# Para que las etiquetas de Prometheus no crezcan sin límite
+RE_IP = re.compile(r"\b\d+\.\d+\.\d+\.\d+\b")
+RE_MAC = re.compile(r"\b[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\.[0-9a-fA-F]{4}\b|\b(?:[0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2}\b")
+
+
+def comando_generico(comando):
+    """'show ip arp 10.1.1.1' -> 'show ip arp <ip>'"""
+    return RE_MAC.sub("<mac>", RE_IP.sub("<ip>", comando.strip()))
+
+
+class Telemetria:
+    """Registra spans; sin destinos configurados sólo acumula los totales en memoria."""
+
+    def __init__(self, ruta_jsonl=None, ruta_prom=None):
+        self.ruta_jsonl = ruta_jsonl
+        self.ruta_prom = ruta_prom
+        self._lock = threading.Lock()
+        self._archivo = None
+        self._totales = {}  # (nombre, comando, host) -> [n, segundos, bytes, reintentos, errores]
+
+    @classmethod
+    def desde_entorno(cls):
+        tel = cls(os.environ.get("TELEMETRIA_JSONL"), os.environ.get("TELEMETRIA_PROM"))
+        if tel.ruta_prom:
+            atexit.register(tel.exportar_prometheus)
+        return tel
+
+    def _emitir(self, registro):
+        clave = (registro["nombre"], registro.get("comando", ""), registro.get("host", ""))
+        with self._lock:
+            t = self._totales.setdefault(clave, [0, 0.0, 0, 0, 0])
+            t[0] += 1
+            t[1] += registro["duracion_ms"] / 1000
+            t[2] += registro.get("bytes", 0)
+            t[3] += registro.get("reintentos", 0)
+            t[4] += 1 if registro.get("error") else 0
+            if self.ruta_jsonl:
+                if self._archivo is None:
+                    self._archivo = open(self.ruta_jsonl, "a", encoding="utf-8")
+                self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                self._archivo.flush()
+
+    @contextmanager
+    def traza(self, objetivo):
+        """Agrupa los spans de un rastreo bajo un mismo id."""
+        token = _traza.set(f"{objetivo}-{uuid.uuid4().hex[:8]}")
+        try:
+            with self.span("traza", objetivo=objetivo) as s:
+                yield s
+        finally:
+            _traza.reset(token)
+
+    @contextmanager
+    def salto(self, numero, host):
+        token = _salto.set(numero)
+        try:
+            with self.span("salto", host=host) as s:
+                yield s
+        finally:
+            _salto.reset(token)
+
+    @contextmanager
+    def span(self, nombre, **atributos):
+        """
+        Mide el bloque. Los atributos (host, comando, bytes, reintentos...) pueden
+        completarse dentro del bloque modificando el dict que se entrega.
+        """
+        registro = {"nombre": nombre, "ts": round(time.time(), 3), **atributos}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except Exception as e:
+            registro["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registro["duracion_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+            if _traza.get():
+                registro["traza"] = _traza.get()
+            if _salto.get() is not None:
+                registro["salto"] = _salto.get()
+            self._emitir(registro)
+
+    def exportar_prometheus(self, ruta=None):
+        ruta = ruta or self.ruta_prom
+        if not ruta:
+            return
+        with self._lock:
+            totales = dict(self._totales)
+        lineas = []
+        metricas = [
+            ("netops_span_segundos", "summary", "Duración de los spans", 1),
+            ("netops_span_bytes_total", "counter", "Bytes de salida recibidos", 2),
+            ("netops_span_reintentos_total", "counter", "Reintentos", 3),
+            ("netops_span_errores_total", "counter", "Spans terminados con error", 4),
+        ]
+        for metrica, tipo, ayuda, i in metricas:
+            lineas.append(f"# HELP {metrica} {ayuda}")
+            lineas.append(f"# TYPE {metrica} {tipo}")
+            for (nombre, comando, host), t in sorted(totales.items()):
+                etiquetas = f'nombre="{nombre}",comando="{comando_generico(comando)}",host="{host}"'
+                if tipo == "summary":
+                    lineas.append(f"{metrica}_sum{{{etiquetas}}} {t[1]:.6f}")
+                    lineas.append(f"{metrica}_count{{{etiquetas}}} {t[0]}")
+                else:
+                    lineas.append(f"{metrica}{{{etiquetas}}} {t[i]}")
+        tmp = ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+        os.replace(tmp, ruta)
+
+
+TELEMETRIA = Telemetria.desde_entorno()
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   ENGANCHES PARA LOS SEND_COMMAND EXISTENTES
+# ╚════════════════════════════════════════════════════════════════╝
+
+def medir_comando(func):
+    """
+    Decorador para send_command(ser, comando, ...) de los scripts serie:
+    un span "comando" con el puerto, el comando y los bytes devueltos.
+    """
+    @functools.wraps(func)
+    def envoltura(ser, comando, *args, **kwargs):
+        with TELEMETRIA.span("comando", host=str(getattr(ser, "port", "")), comando=comando) as s:
+            salida = func(ser, comando, *args, **kwargs)
+            # Las lecturas en flujo devuelven (salida, columnas)
+            s["bytes"] = len(salida if isinstance(salida, str) else salida[0])
+            return salida
+    return envoltura
+
+
+class ConexionInstrumentada:
+    """Proxy de una sesión netmiko que mide cada send_command."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def send_command(self, comando, *args, **kwargs):
+        with TELEMETRIA.span("comando", host=self._conn.host, comando=comando) as s:
+            salida = self._conn.send_command(comando, *args, **kwargs)
+            s["bytes"] = len(salida)
+            return salida
+
+    def find_prompt(self, *args, **kwargs):
+        with TELEMETRIA.span("comando", host=self._conn.host, comando="<prompt>"):
+            return self._conn.find_prompt(*args, **kwargs)
+
+    def leer_en_flujo(self, comando, timeout):
+        """Lectura en flujo (flujo.leer_netmiko) de la sesión envuelta, medida como un send_command."""
+        from flujo import leer_netmiko
+        with TELEMETRIA.span("comando", host=self._conn.host, comando=comando) as s:
+            s["bytes"] = 0
+            for fragmento in leer_netmiko(self._conn, comando, timeout):
+                s["bytes"] += len(fragmento)
+                yield fragmento
+
+
+def conectar_instrumentado(conectar=None):
+    """Función conectar(sw) para PoolSSH: mide el login (span "conectar") e instrumenta la sesión."""
+    if conectar is None:
+        from ssh_pool import conectar_netmiko as conectar
+
+    def envoltura(sw):
+        with TELEMETRIA.span("conectar", host=sw["host"]):
+            return ConexionInstrumentada(conectar(sw))
+
+    return envoltura
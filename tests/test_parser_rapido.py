@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from flujo import lineas
+from parser_rapido import LineaDesconocida, parsear_en_flujo, parsear_ip_int_brief, parsear_rapido, verificar_equivalencia
+from plantillas import REGISTRO
+
+# Capturas reales de "show ip interface brief" (con eco del comando y prompt)
+CAPTURAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capturas")
+# Todas sus líneas las entiende el parser rápido
+NORMALES = ["router_isr.txt", "switch_acceso.txt"]
+# Tienen líneas que el parser rápido no reconoce y deben ir al respaldo TextFSM
+RESPALDO = ["subinterfaz_borrada.txt", "vty_marca_de_tiempo.txt"]
+PLANTILLAS = ["Value.txt", "show ip interface brief"]
+
+
+def leer(nombre):
+    with open(os.path.join(CAPTURAS, nombre), encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def textfsm(salida, plantilla):
+    cabecera, filas = REGISTRO.parsear(plantilla, salida)
+    return cabecera, {c: [f[i] for f in filas] for i, c in enumerate(cabecera)}
+
+
+@pytest.mark.parametrize("plantilla", PLANTILLAS)
+@pytest.mark.parametrize("captura", NORMALES + RESPALDO)
+def test_igual_que_textfsm(captura, plantilla):
+    salida = leer(captura)
+    esperado = textfsm(salida, plantilla)
+    assert esperado[1][esperado[0][0]], "la captura debe producir registros"
+    assert parsear_ip_int_brief(salida, plantilla) == esperado
+    assert verificar_equivalencia(salida, plantilla) is None
+
+
+@pytest.mark.parametrize("plantilla", PLANTILLAS)
+@pytest.mark.parametrize("captura", NORMALES)
+def test_camino_rapido(captura, plantilla):
+    salida = leer(captura)
+    cabecera, esperado = textfsm(salida, plantilla)
+    assert parsear_rapido(salida, cabecera) == esperado
+
+
+@pytest.mark.parametrize("captura", RESPALDO)
+def test_lineas_raras_van_al_respaldo(captura):
+    cabecera = list(REGISTRO.parser("show ip interface brief").header)
+    with pytest.raises(LineaDesconocida):
+        parsear_rapido(leer(captura), cabecera)
+
+
+def test_subinterfaz_borrada():
+    # El estado "deleted" sólo lo conoce la plantilla de ntc
+    _, columnas = parsear_ip_int_brief(leer("subinterfaz_borrada.txt"))
+    assert dict(zip(columnas["INTERFACE"], columnas["STATUS"]))["GigabitEthernet0/1.10"] == "deleted"
+
+
+@pytest.mark.parametrize("plantilla", PLANTILLAS)
+def test_cabecera_sin_compilar(plantilla):
+    # El camino rápido usa la cabecera leída de las líneas Value, sin TextFSM
+    assert REGISTRO.cabecera(plantilla) == list(REGISTRO.parser(plantilla).header)
+
+
+@pytest.mark.parametrize("plantilla", PLANTILLAS)
+@pytest.mark.parametrize("captura", NORMALES + RESPALDO)
+def test_en_flujo_igual_que_de_una_vez(captura, plantilla):
+    # Fragmentos de 7 caracteres: las líneas llegan cortadas como por la consola
+    texto = leer(captura)
+    salida, columnas = parsear_en_flujo(lineas(texto[i:i + 7] for i in range(0, len(texto), 7)), plantilla)
+    assert (columnas is None) == (captura in RESPALDO)
+    assert parsear_ip_int_brief(salida, plantilla, columnas) == parsear_ip_int_brief(texto, plantilla)
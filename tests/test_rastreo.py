@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import io
+import threading
+
+import pytest
+
+import Get_switch
+import rastreo_async
+from benchmark import topologia_sintetica
+from grabacion import conectar_simulado
+from ssh_pool import PoolSSH
+from tablas_cache import CacheTablas
+
+# Topología sintética de benchmark.py: CORE 10.0.0.1 -> DIST 10.0.0.2 -> ACC 10.0.0.3
+RAIZ = {**Get_switch.ROOT_SWITCH, "host": "10.0.0.1"}
+DIST = "10.0.0.2"
+N_HOSTS = 12
+ESPERA_SESION = 2  # segundos; una sesión que no se devuelve hace fallar el test en vez de colgarlo
+
+
+class PoolConEspera(PoolSSH):
+    """PoolSSH cuyo obtener nunca espera indefinidamente."""
+
+    def obtener(self, sw, timeout=None):
+        return super().obtener(sw, ESPERA_SESION if timeout is None else min(timeout, ESPERA_SESION))
+
+
+class Sesiones:
+    """conectar(sw) para PoolSSH que anota las sesiones abiertas; las de `host_roto` fallan en cada comando."""
+
+    def __init__(self, directorio, host_roto=None):
+        self._conectar = conectar_simulado(directorio)
+        self.host_roto = host_roto
+        self.usos_rotas = {}  # id(sesión rota) -> comandos que se le pidieron
+        self._lock = threading.Lock()
+
+    def __call__(self, sw):
+        conn = self._conectar(sw)
+        if sw["host"] == self.host_roto:
+            with self._lock:
+                self.usos_rotas[id(conn)] = 0
+
+            def falla(*args, **kwargs):
+                with self._lock:
+                    self.usos_rotas[id(conn)] += 1
+                raise EOFError("canal SSH cerrado")
+
+            conn.send_command = falla
+        return conn
+
+
+@pytest.fixture
+def red(tmp_path, monkeypatch):
+    """Devuelve una función que prepara Get_switch sobre la topología simulada y da (ips, sesiones)."""
+
+    async def siempre_abierto(*args, **kwargs):
+        return True
+
+    def preparar(host_roto=None, n_hosts=N_HOSTS, duracion=0):
+        ips = topologia_sintetica(str(tmp_path), n_hosts=n_hosts, duracion=duracion)
+        sesiones = Sesiones(str(tmp_path), host_roto)
+        monkeypatch.setattr(Get_switch, "POOL", PoolConEspera(conectar=sesiones))
+        monkeypatch.setattr(Get_switch, "CACHE", CacheTablas())
+        monkeypatch.setattr(Get_switch, "puerto_abierto", lambda *a, **k: True)
+        monkeypatch.setattr(Get_switch.ALCANCE, "sondear_async", siempre_abierto)
+        return ips, sesiones
+
+    return preparar
+
+
+def sin_sesiones_prestadas():
+    return all(n == 0 for n in Get_switch.POOL._en_uso.values())
+
+
+def rastrear_lote(ips):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Get_switch.rastrear_lote(RAIZ, ips, max_workers=4)
+
+
+def rastrear_lote_async(ips, concurrencia):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(rastreo_async.rastrear_lote_async(RAIZ, ips, concurrencia))
+
+
+def test_lote_encuentra_todo(red):
+    ips, _ = red()
+    filas = rastrear_lote(ips)
+    assert {f["ip_buscada"] for f in filas if f["encontrado"]} == set(ips)
+    assert sin_sesiones_prestadas()
+
+
+def test_sesion_que_falla_se_descarta(red):
+    # Antes, cada fallo dejaba la sesión prestada: tras dos, el resto de rastreos esperaba para siempre
+    ips, sesiones = red(host_roto=DIST)
+    filas = rastrear_lote(ips)
+    assert not any(f["encontrado"] for f in filas)
+    assert sin_sesiones_prestadas()
+    assert not Get_switch.POOL.hay_libre(DIST)
+    # Cada sesión rota falló una vez y no se volvió a prestar
+    assert sesiones.usos_rotas and set(sesiones.usos_rotas.values()) == {1}
+
+
+def test_lote_async_sin_interbloqueo(red):
+    # Más rastreos a la vez que hilos del ejecutor por defecto y sólo 2 sesiones por equipo
+    ips, _ = red(n_hosts=48, duracion=0.005)
+    rutas = rastrear_lote_async(ips, concurrencia=48)
+    assert all(rutas[ip] and "ip_device" in rutas[ip][-1] for ip in ips)
+    assert sin_sesiones_prestadas()
+
+
+def test_lote_async_descarta_sesion_que_falla(red):
+    ips, sesiones = red(host_roto=DIST)
+    rutas = rastrear_lote_async(ips, concurrencia=8)
+    assert not any(rutas.values())
+    assert sin_sesiones_prestadas()
+    assert not Get_switch.POOL.hay_libre(DIST)
+    assert sesiones.usos_rotas and set(sesiones.usos_rotas.values()) == {1}
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from alcanzabilidad import Alcanzabilidad
+from ssh_pool import PoolSSH
+from tablas_compactas import int_a_mac, ip_a_int
+from tablas_cache import (
+    descargar_tabla,
+    normalizar_interfaz,
+    vecinos_cdp,
+)
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   CRAWL DE TOPOLOGÍA (CDP) Y SNAPSHOT EN SQLITE
+# ╚════════════════════════════════════════════════════════════════╝
+
+SNAPSHOT_DB = "topologia.db"
+MAX_EQUIPOS_PARALELOS = 16
+
+# Sólo se sigue a vecinos CDP que anuncian alguna de estas capacidades
+CAPACIDADES_RED = ("Switch", "Router")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE IF NOT EXISTS dispositivos (host TEXT PRIMARY KEY, hostname TEXT, error TEXT);
+CREATE TABLE IF NOT EXISTS arp (host TEXT, ip INTEGER, mac INTEGER, PRIMARY KEY (host, ip)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS mac (host TEXT, mac INTEGER, vlan TEXT, intf TEXT, PRIMARY KEY (host, mac)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cdp (host TEXT, intf TEXT, vecino_ip TEXT, device_id TEXT, PRIMARY KEY (host, intf)) WITHOUT ROWID;
+"""
+# IPs y MACs se guardan como enteros (tablas_compactas)
+
+
+def _credenciales(raiz, host):
+    return {
+        "device_type": raiz.get("device_type", "cisco_ios"),
+        "host": host,
+        "username": raiz["username"],
+        "password": raiz["password"],
+    }
+
+
+def recolectar_equipo(pool, sw):
+    """Descarga hostname, ARP, tabla MAC y vecinos CDP de un equipo."""
+    with pool.sesion(sw) as conn:
+        hostname = conn.find_prompt().replace("#", "").strip()
+        arp = descargar_tabla(conn, "arp")
+        mac = descargar_tabla(conn, "mac")
+        vecinos = vecinos_cdp(conn.send_command("show cdp neighbors detail"))
+    return {"host": sw["host"], "hostname": hostname, "arp": arp, "mac": mac, "cdp": vecinos}
+
+
+def es_equipo_de_red(vecino):
+    caps = vecino.get("capacidades", "")
+    # Si el equipo no informa capacidades se intenta igualmente
+    return not caps or any(c in caps for c in CAPACIDADES_RED)
+
+
+def crawl(raiz, pool=None, max_workers=MAX_EQUIPOS_PARALELOS, alcance=None):
+    """
+    Recorre el grafo CDP desde `raiz` por niveles; los equipos de cada nivel
+    se consultan en paralelo. Antes de cada nivel se sondea el puerto 22 de
+    todos sus equipos a la vez y los inalcanzables no ocupan un hilo.
+    Devuelve {host: datos o {"error": ...}}.
+    """
+    pool = pool or PoolSSH()
+    alcance = alcance or Alcanzabilidad()
+    equipos = {}
+    pendientes = [raiz["host"]]
+    vistos = {raiz["host"]}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as ejecutor:
+        while pendientes:
+            print(f"🔎 Consultando {len(pendientes)} equipos...")
+            alcanzables = alcance.escanear(pendientes)
+            for host in [h for h in pendientes if not alcanzables[h]]:
+                print(f"⚠️ {host} no responde en el puerto 22.")
+                equipos[host] = {"host": host, "error": "puerto 22 inalcanzable"}
+            pendientes = [h for h in pendientes if alcanzables[h]]
+            futuros = {
+                host: ejecutor.submit(recolectar_equipo, pool, _credenciales(raiz, host))
+                for host in pendientes
+            }
+            pendientes = []
+            for host, futuro in futuros.items():
+                try:
+                    datos = futuro.result()
+                except Exception as e:
+                    print(f"⚠️ No se pudo recolectar {host}: {e}")
+                    equipos[host] = {"host": host, "error": str(e)}
+                    continue
+                equipos[host] = datos
+                for v in datos["cdp"]:
+                    if v["ip"] not in vistos and es_equipo_de_red(v):
+                        vistos.add(v["ip"])
+                        pendientes.append(v["ip"])
+    return equipos
+
+
+def guardar_snapshot(equipos, raiz_host, ruta_db=SNAPSHOT_DB):
+    """
+    Escribe el resultado del crawl en SQLite. El snapshot nuevo se escribe en un
+    archivo temporal junto al destino y se cambia por el anterior de una vez:
+    quien consulta durante el guardado sigue viendo el snapshot completo anterior,
+    y si el guardado se interrumpe el anterior queda intacto.
+    """
+    tmp = f"{ruta_db}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        con = sqlite3.connect(tmp)
+        try:
+            with con:
+                con.executescript(ESQUEMA)
+                con.executemany("INSERT INTO meta VALUES (?, ?)", [
+                    ("raiz", raiz_host),
+                    ("creado", time.strftime("%Y-%m-%d %H:%M:%S")),
+                ])
+                for host, d in equipos.items():
+                    con.execute("INSERT INTO dispositivos VALUES (?, ?, ?)",
+                                (host, d.get("hostname", ""), d.get("error")))
+                    if "arp" in d:
+                        con.executemany("INSERT INTO arp VALUES (?, ?, ?)",
+                                        ((host, ip, mac) for ip, mac in d["arp"].pares_int()))
+                    if "mac" in d:
+                        con.executemany("INSERT INTO mac VALUES (?, ?, ?, ?)",
+                                        ((host, mac, str(vlan), intf) for mac, vlan, intf in d["mac"].filas_int()))
+                    con.executemany("INSERT OR IGNORE INTO cdp VALUES (?, ?, ?, ?)",
+                                    ((host, v["interfaz"], v["ip"], v["device_id"]) for v in d.get("cdp", [])))
+        finally:
+            con.close()
+        os.replace(tmp, ruta_db)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    print(f"📄 Snapshot guardado en: {ruta_db}")
+
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   CONSULTAS SOBRE EL SNAPSHOT (SIN ACCESO A EQUIPOS)
+# ╚════════════════════════════════════════════════════════════════╝
+
+class Snapshot:
+    """Resuelve IP -> ruta de switches y puerto final usando sólo el snapshot."""
+
+    def __init__(self, ruta_db=SNAPSHOT_DB):
+        self.con = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True, check_same_thread=False)
+        self.raiz = self._uno("SELECT valor FROM meta WHERE clave = 'raiz'")
+        self.creado = self._uno("SELECT valor FROM meta WHERE clave = 'creado'")
+        self.hostnames = dict(self.con.execute("SELECT host, hostname FROM dispositivos"))
+
+    def _uno(self, sql, params=()):
+        fila = self.con.execute(sql, params).fetchone()
+        return fila[0] if fila else None
+
+    def cerrar(self):
+        self.con.close()
+
+    def resolver(self, ip, raiz=None):
+        """
+        Devuelve la ruta con el mismo formato de filas que Get_switch.rastrear.
+        Si un switch de acceso no tiene la IP en ARP se usa la MAC del salto anterior.
+        """
+        try:
+            clave_ip = ip_a_int(ip)
+        except OSError:
+            return []
+        ruta = []
+        actual = raiz or self.raiz
+        visitados = set()
+        mac = None
+        while actual and actual not in visitados:
+            visitados.add(actual)
+            mac = self._uno("SELECT mac FROM arp WHERE host = ? AND ip = ?", (actual, clave_ip)) or mac
+            if not mac:
+                break
+            fila = self.con.execute("SELECT vlan, intf FROM mac WHERE host = ? AND mac = ?",
+                                    (actual, mac)).fetchone()
+            if not fila:
+                break
+            vlan, intf = fila
+            vecino = self._uno("SELECT vecino_ip FROM cdp WHERE host = ? AND intf = ?",
+                               (actual, normalizar_interfaz(intf)))
+            salto = {"sw_name": self.hostnames.get(actual, ""), "ip_sw": actual, "puerto": intf, "vlan": vlan}
+            if vecino:
+                ruta.append({**salto, "next_ip": vecino})
+                actual = vecino
+                continue
+            ruta.append({**salto, "mac_device": int_a_mac(mac, "dos_puntos"), "ip_device": ip})
+            break
+        return ruta
+
+
+def resolver_ip(ip, ruta_db=SNAPSHOT_DB):
+    """Atajo para una consulta suelta."""
+    snap = Snapshot(ruta_db)
+    try:
+        return snap.resolver(ip)
+    finally:
+        snap.cerrar()
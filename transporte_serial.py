@@ -0,0 +1,71 @@
+import codecs
+import re
+import time
+
+# ╔════════════════════════════════════════════════════════════════╗
+#   LECTURA SERIAL GUIADA POR PROMPT (SIN SLEEPS FIJOS)
+# ╚════════════════════════════════════════════════════════════════╝
+
+TIMEOUT_COMANDO = 30  # segundos máximos esperando el prompt
+
+# Router>, Router#, Router(config-if)#  al final de la última línea
+RE_PROMPT = re.compile(r"(?:^|\n)[\w.\-@/:]+(?:\([\w.\-/ ]+\))?[>#]\s*$")
+RE_MORE = re.compile(r" *--More-- *")
+RE_BORRADO = re.compile(r"\x08+ *\x08*")
+
+
+def _limpiar_linea(texto):
+    """Quita marcas de paginación y los retrocesos que el equipo envía tras --More--."""
+    return RE_BORRADO.sub("", RE_MORE.sub("", texto))
+
+
+def leer_hasta_prompt(ser, timeout=TIMEOUT_COMANDO, prompt=RE_PROMPT, eco=None):
+    """
+    Generador: lee del puerto a medida que llegan datos y va entregando
+    líneas completas. Termina al ver el prompt (que se entrega al final).
+    Si aparece --More-- envía un espacio y sigue.
+    Con `eco` (el comando enviado) el prompt sólo cuenta después de leer la
+    línea con el eco: un prompt atrasado del comando anterior no corta la salida.
+    Si se agota `timeout` entrega lo recibido y lanza TimeoutError, porque la
+    salida está incompleta y el equipo puede seguir enviando.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    pendiente = ""   # última línea incompleta (donde aparecen prompt y --More--)
+    visto_eco = not eco
+    limite = time.monotonic() + timeout
+
+    while time.monotonic() < limite:
+        # Bloquea como mucho ser.timeout esperando el primer byte
+        datos = ser.read(ser.in_waiting or 1)
+        if not datos:
+            continue
+        pendiente += decoder.decode(datos)
+
+        if "--More--" in pendiente:
+            ser.write(b" ")
+            pendiente = RE_MORE.sub("", pendiente)
+
+        corte = pendiente.rfind("\n")
+        if corte >= 0:
+            completas = pendiente[:corte + 1]
+            visto_eco = visto_eco or eco in completas
+            yield _limpiar_linea(completas)
+            pendiente = pendiente[corte + 1:]
+
+        if visto_eco and prompt.search(pendiente) and ser.in_waiting == 0:
+            yield _limpiar_linea(pendiente)
+            return
+
+    # Timeout: entregar lo que haya llegado y avisar
+    if pendiente:
+        yield _limpiar_linea(pendiente)
+    raise TimeoutError(f"Sin prompt en {getattr(ser, 'port', 'el puerto serie')} tras {timeout} s")
+
+
+def enviar_comando(ser, comando, timeout=TIMEOUT_COMANDO):
+    """Envía `comando` y devuelve un generador con la respuesta por fragmentos."""
+    # Un comando vacío ("\n") es un solo Enter: con "\n\r\n" el equipo contestaría dos prompts
+    comando = comando.strip()
+    ser.reset_input_buffer()
+    ser.write((comando + "\r\n").encode())
+    return leer_hasta_prompt(ser, timeout=timeout, eco=comando)